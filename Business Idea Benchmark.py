@@ -0,0 +1,254 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# The generator lives in a script whose filename has spaces, so load it by path
+_spec = importlib.util.spec_from_file_location(
+    "business_idea_generator", os.path.join(os.path.dirname(os.path.abspath(__file__)), "Business Idea Generator.py"))
+business = importlib.util.module_from_spec(_spec)
+sys.modules[_spec.name] = business
+_spec.loader.exec_module(business)
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000, 10_000_000]
+
+
+class Stages:
+    """Wall time per named stage of one case run"""
+
+    def __init__(self):
+        self.seconds = {}
+
+    @contextmanager
+    def __call__(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def wrap(self, generator, method, stage):
+        """Time every call of one generator method under stage"""
+        original = getattr(generator, method)
+
+        def timed(*args, **kwargs):
+            with self(stage):
+                return original(*args, **kwargs)
+        setattr(generator, method, timed)
+
+    def split(self, total, part, rest):
+        """Replace stage total by the time it did not spend in stage part"""
+        self.seconds[rest] = self.seconds.pop(total, 0.0) - self.seconds.get(part, 0.0)
+
+
+def time_sampling(generator, stages):
+    """Time the column samplers the bulk paths start with"""
+    stages.wrap(generator, "sample_columns", "sampling")
+    stages.wrap(generator, "sample_unique_columns", "sampling")
+
+
+def bench_method(method):
+    """Time generate_idea_from_<method> called once per idea"""
+    def run(generator, size, workdir, stages):
+        generate = getattr(generator, f"generate_idea_from_{method}")
+        with stages("generate"):
+            for _ in range(size):
+                generate()
+    return run
+
+
+def bench_format_idea(generator, size, workdir, stages):
+    """Time _format_idea alone on pre-sampled concept fields"""
+    with stages("sampling"):
+        rows = [(record.industry, record.niche, record.demographic, record.psychographic, record.trend,
+                 record.business_model, record.revenue_stream, record.constraint)
+                for record in generator.generate_records(min(size, 10_000))]
+    with stages("_format_idea"):
+        for i in range(size):
+            generator._format_idea(*rows[i % len(rows)])
+
+
+def bench_collection(method, batch=False, unique=False):
+    """Time generate_collection with the given options"""
+    def run(generator, size, workdir, stages):
+        time_sampling(generator, stages)
+        with stages("generate"):
+            generator.generate_collection(size, method, batch=batch, unique=unique)
+        if batch or unique:
+            # The bulk path samples every column first, then formats each idea
+            stages.split("generate", "sampling", "_format_idea")
+    return run
+
+
+def bench_records(generator, size, workdir, stages):
+    """Time generate_records, which skips text rendering"""
+    time_sampling(generator, stages)
+    with stages("generate"):
+        generator.generate_records(size)
+    stages.split("generate", "sampling", "build_records")
+
+
+def bench_save_collection(generator, size, workdir, stages):
+    """Time generation plus save_collection's single pretty-printed dump"""
+    time_sampling(generator, stages)
+    with stages("generate"):
+        collection = generator.generate_collection(size, batch=True)
+    stages.split("generate", "sampling", "_format_idea")
+    with stages("serialization"):
+        generator.save_collection(collection, os.path.join(workdir, "bench.json"))
+
+
+def bench_save_stream(generator, size, workdir, stages):
+    """Time generation streamed through save_collection_stream"""
+    # Generation and writing interleave, so generation is timed from inside
+    time_sampling(generator, stages)
+    stages.wrap(generator, "generate_batch", "generate")
+    with stages("total"):
+        generator.save_collection_stream(generator.iter_collection(size, batch=True), os.path.join(workdir, "bench.jsonl"))
+    stages.split("total", "generate", "serialization")
+    stages.split("generate", "sampling", "_format_idea")
+
+
+def bench_save_columnar(generator, size, workdir, stages):
+    """Time record generation followed by save_columnar"""
+    time_sampling(generator, stages)
+    with stages("generate"):
+        records = generator.generate_records(size)
+    stages.split("generate", "sampling", "build_records")
+    with stages("serialization"):
+        generator.save_columnar(records, os.path.join(workdir, "bench.bidc"))
+
+
+CASES = {
+    "generate_idea_from_industry": bench_method("industry"),
+    "generate_idea_from_audience": bench_method("audience"),
+    "generate_idea_from_trend": bench_method("trend"),
+    "_format_idea": bench_format_idea,
+    "generate_collection[mixed]": bench_collection("mixed"),
+    "generate_collection[batch]": bench_collection("mixed", batch=True),
+    "generate_collection[unique]": bench_collection("mixed", unique=True),
+    "generate_records": bench_records,
+    "save_collection": bench_save_collection,
+    "save_collection_stream": bench_save_stream,
+    "save_columnar": bench_save_columnar
+}
+
+
+def run_once(name, size, workdir):
+    """Run one case on a fresh generator and return (seconds, stage seconds)"""
+    generator = business.BusinessIdeaGenerator(seed=0)
+    stages = Stages()
+    start = time.perf_counter()
+    CASES[name](generator, size, workdir, stages)
+    return time.perf_counter() - start, stages.seconds
+
+
+def peak_memory(name, size, workdir):
+    """Return the peak traced memory of one run"""
+    # tracemalloc slows everything down, so memory is measured on a separate run
+    tracemalloc.start()
+    CASES[name](business.BusinessIdeaGenerator(seed=0), size, workdir, Stages())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def run_suite(names, sizes, workdir, repeats=5, warmup=1, measure_memory=True):
+    """Run every case at every size and return one result row per pair
+
+    Timed runs go round-robin over the whole suite, so a slow spell on the
+    machine hits one run of many cases rather than every run of one case.
+    Each row reports the fastest run, the one least disturbed by other load.
+    """
+    if not sizes:
+        return []
+    for _ in range(warmup):
+        for name in names:
+            run_once(name, min(min(sizes), 10_000), workdir)
+
+    runs = {(name, size): [] for size in sizes for name in names}
+    for _ in range(max(1, repeats)):
+        for name, size in runs:
+            runs[name, size].append(run_once(name, size, workdir))
+
+    results = []
+    for (name, size), timings in runs.items():
+        timings.sort(key=lambda run: run[0])
+        seconds, stages = timings[0]
+        results.append({
+            "case": name,
+            "size": size,
+            "seconds": seconds,
+            "median_seconds": timings[len(timings) // 2][0],
+            "repeats": len(timings),
+            "ideas_per_sec": size / seconds,
+            "stages": stages,
+            "peak_bytes": peak_memory(name, size, workdir) if measure_memory else None
+        })
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return the results whose throughput fell more than tolerance below the baseline"""
+    previous = {(row["case"], row["size"]): row for row in baseline["results"]}
+    regressions = []
+    for row in results:
+        old = previous.get((row["case"], row["size"]))
+        if old and row["ideas_per_sec"] < old["ideas_per_sec"] * (1 - tolerance):
+            regressions.append((row, old))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the business idea pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="collection sizes to run")
+    parser.add_argument("--max-size", type=int, default=100_000, help="skip sizes above this (default: 100000)")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=list(CASES), help="cases to run")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the results")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed throughput drop (default: 0.10)")
+    parser.add_argument("--repeats", type=int, default=5, help="timed runs per case, the fastest is kept (default: 5)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed rounds over every case at the smallest size (max 10000) before timing starts (default: 1)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory runs")
+    args = parser.parse_args()
+
+    sizes = sorted(size for size in args.sizes if size <= args.max_size)
+    if not sizes:
+        parser.error(f"every size in --sizes is above --max-size {args.max_size}; raise --max-size to run them")
+    with tempfile.TemporaryDirectory() as workdir:
+        results = run_suite(args.cases, sizes, workdir, args.repeats, args.warmup, not args.no_memory)
+    for row in results:
+        peak = f"{row['peak_bytes'] / 2**20:9.1f} MiB" if row["peak_bytes"] is not None else ""
+        print(f"{row['case']:32} {row['size']:>10,} {row['seconds']:9.3f}s {row['ideas_per_sec']:12,.0f} ideas/s {peak}",
+              file=sys.stderr)
+        stages = "  ".join(f"{stage} {seconds:.3f}s" for stage, seconds in row["stages"].items())
+        print(f"{'':32} {'':>10} {stages}", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for row, old in regressions:
+            print(f"REGRESSION {row['case']} @ {row['size']:,}: {row['ideas_per_sec']:,.0f} ideas/s "
+                  f"vs baseline {old['ideas_per_sec']:,.0f}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,34 @@
 import random
 import json
+import asyncio
+import copy
+import gzip
+import heapq
+import math
+import mmap
+import os
+import re
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import islice
+from urllib.parse import urlsplit, parse_qs
+
+# Concept fields stored by the columnar format, in column order
+COLUMNAR_FIELDS = ("industry", "niche", "demographic", "psychographic", "trend",
+                   "business_model", "revenue_stream", "constraint")
+COLUMNAR_MAGIC = b"BIDEAS01"
 
 class BusinessIdeaGenerator:
-    def __init__(self):
+    def __init__(self, seed=None, sampling="category"):
+        # A seeded generator gets a private RNG stream; otherwise share the global one
+        self.rng = random.Random(seed) if seed is not None else random
+        # "category" picks a category then an item within it; "uniform" picks any leaf with equal odds
+        self.sampling = sampling
+        # Set by use_unique_names() to stop business names repeating
+        self.name_registry = None
+
         # Industries with specific niches
         self.industries = {
             "Technology": ["AI", "Blockchain", "IoT", "AR/VR", "Cybersecurity", "Edge Computing", "Quantum Computing"],
@@ -61,46 +86,83 @@ class BusinessIdeaGenerator:
             "Technological": ["Technical complexity", "Integration challenges", "Rapid obsolescence", "Cybersecurity risks", "Data privacy concerns"]
         }
 
+        self.compile_catalogs()
+
+    def compile_catalogs(self):
+        """Compile the catalogs into flat lookup tables; call again after editing a catalog"""
+        self.catalog_index = {
+            "industries": CatalogIndex(self.industries),
+            "demographics": CatalogIndex(self.audiences["Demographics"]),
+            "psychographics": CatalogIndex(self.audiences["Psychographics"]),
+            "trends": CatalogIndex(self.trends),
+            "business_models": CatalogIndex(self.business_models),
+            "revenue_streams": CatalogIndex(self.revenue_streams),
+            "constraints": CatalogIndex(self.constraints)
+        }
+        # Per-idea draws index these tables with one random number; industries yield (industry, niche)
+        uniform = self.sampling == "uniform"
+        self._draw_tables = {name: [index.items[leaf] for leaf in index.draw_table(uniform)]
+                             for name, index in self.catalog_index.items()}
+        industries = self.catalog_index["industries"]
+        self._draw_tables["industries"] = [(industries.category_of(leaf), industries.items[leaf])
+                                           for leaf in industries.draw_table(uniform)]
+
+    def use_unique_names(self, filename=None):
+        """Guarantee unique business names for this run, or across runs sharing a namespace file"""
+        words = set()
+        for catalog in ("industries", "demographics", "psychographics", "trends"):
+            words.update(item.split()[0] for item in self.catalog_index[catalog].items)
+        self.name_registry = NameRegistry(sorted(words))
+        if filename and os.path.exists(filename):
+            self.name_registry.load(filename)
+        return self.name_registry
+
+    def _draw(self, catalog):
+        """Draw one value from a compiled catalog with a single random number"""
+        table = self._draw_tables[catalog]
+        return table[int(self.rng.random() * len(table))]
+
     def get_random_item(self, dictionary, key=None):
         """Get a random item from a dictionary, optionally from a specific key"""
         if key:
             if isinstance(dictionary[key], list):
-                return random.choice(dictionary[key])
+                return self.rng.choice(dictionary[key])
             else:
-                sub_key = random.choice(list(dictionary[key].keys()))
-                return random.choice(dictionary[key][sub_key])
+                sub_key = self.rng.choice(list(dictionary[key].keys()))
+                return self.rng.choice(dictionary[key][sub_key])
         else:
-            main_key = random.choice(list(dictionary.keys()))
+            main_key = self.rng.choice(list(dictionary.keys()))
             if isinstance(dictionary[main_key], list):
-                return main_key, random.choice(dictionary[main_key])
+                return main_key, self.rng.choice(dictionary[main_key])
             else:
-                sub_key = random.choice(list(dictionary[main_key].keys()))
-                return main_key, sub_key, random.choice(dictionary[main_key][sub_key])
+                sub_key = self.rng.choice(list(dictionary[main_key].keys()))
+                return main_key, sub_key, self.rng.choice(dictionary[main_key][sub_key])
+
+    def _draw_industry(self):
+        """Draw an (industry, niche) pair from the compiled industry catalog"""
+        table = self._draw_tables["industries"]
+        return table[int(self.rng.random() * len(table))]
 
     def generate_idea_from_industry(self, industry=None, niche=None):
         """Generate a business idea based on a specific industry"""
         if not industry:
-            industry, niche = self.get_random_item(self.industries)
+            industry, niche = self._draw_industry()
         elif not niche and industry in self.industries:
-            niche = random.choice(self.industries[industry])
+            niche = self.rng.choice(self.industries[industry])
         
         # Get random audience
-        demo_category = random.choice(list(self.audiences["Demographics"].keys()))
-        demographic = random.choice(self.audiences["Demographics"][demo_category])
-        psycho_category = random.choice(list(self.audiences["Psychographics"].keys()))
-        psychographic = random.choice(self.audiences["Psychographics"][psycho_category])
+        demographic = self._draw("demographics")
+        psychographic = self._draw("psychographics")
         
         # Get random trend
-        trend_category = random.choice(list(self.trends.keys()))
-        trend = random.choice(self.trends[trend_category])
+        trend = self._draw("trends")
         
         # Get business model and revenue stream
-        business_model = random.choice(self.business_models)
-        revenue_stream = random.choice(self.revenue_streams)
+        business_model = self._draw("business_models")
+        revenue_stream = self._draw("revenue_streams")
         
         # Get constraints
-        constraint_category = random.choice(list(self.constraints.keys()))
-        constraint = random.choice(self.constraints[constraint_category])
+        constraint = self._draw("constraints")
         
         # Generate the idea
         idea = self._format_idea(industry, niche, demographic, psychographic, trend, business_model, revenue_stream, constraint)
@@ -109,27 +171,23 @@ class BusinessIdeaGenerator:
     def generate_idea_from_audience(self, demographic=None, psychographic=None):
         """Generate a business idea based on a specific audience"""
         if not demographic:
-            demo_category = random.choice(list(self.audiences["Demographics"].keys()))
-            demographic = random.choice(self.audiences["Demographics"][demo_category])
+            demographic = self._draw("demographics")
         
         if not psychographic:
-            psycho_category = random.choice(list(self.audiences["Psychographics"].keys()))
-            psychographic = random.choice(self.audiences["Psychographics"][psycho_category])
+            psychographic = self._draw("psychographics")
         
         # Get random industry
-        industry, niche = self.get_random_item(self.industries)
+        industry, niche = self._draw_industry()
         
         # Get random trend
-        trend_category = random.choice(list(self.trends.keys()))
-        trend = random.choice(self.trends[trend_category])
+        trend = self._draw("trends")
         
         # Get business model and revenue stream
-        business_model = random.choice(self.business_models)
-        revenue_stream = random.choice(self.revenue_streams)
+        business_model = self._draw("business_models")
+        revenue_stream = self._draw("revenue_streams")
         
         # Get constraints
-        constraint_category = random.choice(list(self.constraints.keys()))
-        constraint = random.choice(self.constraints[constraint_category])
+        constraint = self._draw("constraints")
         
         # Generate the idea
         idea = self._format_idea(industry, niche, demographic, psychographic, trend, business_model, revenue_stream, constraint)
@@ -138,39 +196,42 @@ class BusinessIdeaGenerator:
     def generate_idea_from_trend(self, trend=None):
         """Generate a business idea based on a specific trend"""
         if not trend:
-            trend_category = random.choice(list(self.trends.keys()))
-            trend = random.choice(self.trends[trend_category])
+            trend = self._draw("trends")
         
         # Get random industry
-        industry, niche = self.get_random_item(self.industries)
+        industry, niche = self._draw_industry()
         
         # Get random audience
-        demo_category = random.choice(list(self.audiences["Demographics"].keys()))
-        demographic = random.choice(self.audiences["Demographics"][demo_category])
-        psycho_category = random.choice(list(self.audiences["Psychographics"].keys()))
-        psychographic = random.choice(self.audiences["Psychographics"][psycho_category])
+        demographic = self._draw("demographics")
+        psychographic = self._draw("psychographics")
         
         # Get business model and revenue stream
-        business_model = random.choice(self.business_models)
-        revenue_stream = random.choice(self.revenue_streams)
+        business_model = self._draw("business_models")
+        revenue_stream = self._draw("revenue_streams")
         
         # Get constraints
-        constraint_category = random.choice(list(self.constraints.keys()))
-        constraint = random.choice(self.constraints[constraint_category])
+        constraint = self._draw("constraints")
         
         # Generate the idea
         idea = self._format_idea(industry, niche, demographic, psychographic, trend, business_model, revenue_stream, constraint)
         return idea
 
+    def _describe(self, niche, demographic, psychographic, trend, business_model):
+        """Build the one-sentence description of an idea"""
+        return f"A {business_model.lower()} business offering {niche.lower()} solutions for {demographic.lower()} who are {psychographic.lower()}, capitalizing on the {trend.lower()} trend."
+
     def _format_idea(self, industry, niche, demographic, psychographic, trend, business_model, revenue_stream, constraint):
         """Format the business idea into a structured output"""
         # Generate a creative name
         name_elements = [niche, demographic, psychographic, trend]
-        random.shuffle(name_elements)
-        business_name = f"{random.choice(name_elements).split()[0]}{random.choice(['Hub', 'Go', 'Ly', 'ify', 'Wise', 'Now', 'Sync', 'Pulse'])}"
+        self.rng.shuffle(name_elements)
+        if self.name_registry is not None:
+            business_name = self.name_registry.claim(name_elements, self.rng)
+        else:
+            business_name = f"{self.rng.choice(name_elements).split()[0]}{self.rng.choice(['Hub', 'Go', 'Ly', 'ify', 'Wise', 'Now', 'Sync', 'Pulse'])}"
         
         # Generate a concise description
-        description = f"A {business_model.lower()} business offering {niche.lower()} solutions for {demographic.lower()} who are {psychographic.lower()}, capitalizing on the {trend.lower()} trend."
+        description = self._describe(niche, demographic, psychographic, trend, business_model)
         
         # Generate unique value proposition
         value_props = [
@@ -180,7 +241,7 @@ class BusinessIdeaGenerator:
             f"Rides the wave of {trend}",
             f"Disrupts traditional {industry.lower()} with innovative approach"
         ]
-        random.shuffle(value_props)
+        self.rng.shuffle(value_props)
         value_proposition = value_props[:3]
         
         # Generate potential challenges and solutions
@@ -193,7 +254,7 @@ class BusinessIdeaGenerator:
             "Leveraging existing platforms instead of building from scratch",
             "Focusing on a highly specific niche to avoid direct competition"
         ]
-        solution = f"Potential Solution: {random.choice(solutions)}"
+        solution = f"Potential Solution: {self.rng.choice(solutions)}"
         
         # Format the complete idea
         idea = {
@@ -220,8 +281,61 @@ class BusinessIdeaGenerator:
         
         return idea
 
-    def generate_collection(self, count=5, method="mixed"):
+    def sample_columns(self, count):
+        """Sample every concept field for count ideas as columns of catalog leaf indices"""
+        uniform = self.sampling == "uniform"
+        return {name: index.sample_indices(self.rng, count, uniform) for name, index in self.catalog_index.items()}
+
+    def combination_space(self):
+        """Return how many distinct concept tuples the compiled catalogs can produce"""
+        return math.prod(len(index) for index in self.catalog_index.values())
+
+    def sample_unique_columns(self, count):
+        """Sample count distinct concept tuples, drawn uniformly over the combination space"""
+        space = self.combination_space()
+        if count > space:
+            raise ValueError(f"Cannot generate {count} unique ideas: the catalogs only allow {space} distinct combinations")
+
+        # Each tuple is a mixed-radix number with one digit per field, so distinct ranks give distinct ideas
+        names = list(self.catalog_index)
+        radices = [(name, len(self.catalog_index[name])) for name in reversed(names)]
+        columns = {name: [] for name in names}
+        for rank in self.rng.sample(range(space), count):
+            for name, radix in radices:
+                rank, digit = divmod(rank, radix)
+                columns[name].append(digit)
+        return columns
+
+    def generate_batch(self, count=5, unique=False):
+        """Generate ideas in bulk by sampling every field as an index column first"""
+        # One draw per field for the whole batch instead of a dozen calls per idea
+        columns = self.sample_unique_columns(count) if unique else self.sample_columns(count)
+        index = self.catalog_index
+        industries = index["industries"]
+
+        collection = []
+        for i, d, p, t, m, r, c in zip(*(columns[name] for name in index)):
+            idea = self._format_idea(industries.category_of(i), industries.items[i],
+                                     index["demographics"].items[d], index["psychographics"].items[p],
+                                     index["trends"].items[t], index["business_models"].items[m],
+                                     index["revenue_streams"].items[r], index["constraints"].items[c])
+            collection.append(idea)
+
+        return collection
+
+    def generate_records(self, count=5, unique=False):
+        """Generate compact IdeaRecords that keep only field indices and render text on demand"""
+        columns = self.sample_unique_columns(count) if unique else self.sample_columns(count)
+        # A batch is generated in one go, so its records share a single timestamp string
+        generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return [IdeaRecord(self, codes, generated_at) for codes in zip(*columns.values())]
+
+    def generate_collection(self, count=5, method="mixed", batch=False, unique=False):
         """Generate a collection of business ideas"""
+        if batch or unique:
+            # Every field is random whichever method is used, so the batch path covers them all
+            return self.generate_batch(count, unique=unique)
+
         collection = []
         
         for _ in range(count):
@@ -232,7 +346,7 @@ class BusinessIdeaGenerator:
             elif method == "trend":
                 idea = self.generate_idea_from_trend()
             else:  # mixed
-                choice = random.choice(["industry", "audience", "trend"])
+                choice = self.rng.choice(["industry", "audience", "trend"])
                 if choice == "industry":
                     idea = self.generate_idea_from_industry()
                 elif choice == "audience":
@@ -244,12 +358,176 @@ class BusinessIdeaGenerator:
         
         return collection
 
+    def generate_collection_parallel(self, count=5, method="mixed", workers=None, seed=0, batch=True):
+        """Generate a collection across a process pool with one seeded RNG stream per shard"""
+        workers = workers or os.cpu_count() or 1
+        # Shard sizes and seeds depend only on (seed, count, workers), so the output is reproducible
+        sizes = [count // workers + (1 if i < count % workers else 0) for i in range(workers)]
+        shards = [(self._catalog_state(), f"{seed}:{i}", size, method, batch)
+                  for i, size in enumerate(sizes) if size]
+        if self.name_registry is not None:
+            # Each shard claims names from its own part of the name space, so shards never collide
+            shards = [args + (self.name_registry.partition(i, len(shards)),) for i, args in enumerate(shards)]
+
+        collection = []
+        with ProcessPoolExecutor(max_workers=len(shards) or 1) as executor:
+            for shard, registry in executor.map(_generate_shard, shards):
+                collection.extend(shard)
+                if registry is not None:
+                    self.name_registry.merge(registry)
+
+        return collection
+
+    def _catalog_state(self):
+        """Return the catalogs a worker process needs to rebuild this generator"""
+        return {
+            "industries": self.industries,
+            "audiences": self.audiences,
+            "trends": self.trends,
+            "business_models": self.business_models,
+            "revenue_streams": self.revenue_streams,
+            "constraints": self.constraints,
+            "sampling": self.sampling
+        }
+
     def save_collection(self, collection, filename="business_ideas.json"):
         """Save the collection to a JSON file"""
         with open(filename, 'w') as f:
             json.dump(collection, f, indent=4)
         print(f"Collection saved to {filename}")
 
+    def iter_collection(self, count=5, method="mixed", chunk_size=1000, batch=False):
+        """Yield business ideas lazily, generating at most chunk_size of them at a time"""
+        remaining = count
+        while remaining > 0:
+            size = min(chunk_size, remaining)
+            yield from self.generate_collection(size, method, batch=batch)
+            remaining -= size
+
+    def save_collection_stream(self, ideas, filename="business_ideas.jsonl", compress=None, chunk_size=1000):
+        """Stream ideas from any iterable to a newline-delimited JSON file, optionally gzipped"""
+        if compress is None:
+            compress = filename.endswith(".gz")
+
+        written = 0
+        lines = []
+        f = gzip.open(filename, 'wt', encoding="utf-8") if compress else open(filename, 'w', encoding="utf-8", buffering=1 << 20)
+        with f:
+            for idea in ideas:
+                if isinstance(idea, IdeaRecord):
+                    idea = idea.to_dict()
+                lines.append(json.dumps(idea))
+                if len(lines) >= chunk_size:
+                    # Write a whole chunk at once so memory stays bounded by chunk_size
+                    f.write("\n".join(lines) + "\n")
+                    written += len(lines)
+                    lines = []
+            if lines:
+                f.write("\n".join(lines) + "\n")
+                written += len(lines)
+
+        print(f"Streamed {written} ideas to {filename}")
+        return written
+
+    def save_columnar(self, ideas, filename="business_ideas.bidc", row_group_size=65536, index_fields=COLUMNAR_FIELDS):
+        """Save ideas or IdeaRecords as one small-integer column per concept field
+
+        index_fields lists the fields (or True for all of them) that get a per-value
+        bitmap in every row group, so queries on them skip the column scan. Every
+        field is indexed by default; pass () to write the columns only.
+        """
+        if index_fields is True:
+            index_fields = COLUMNAR_FIELDS
+        # Dictionaries start from the catalogs and grow if an idea carries a custom value
+        dictionaries = self.column_dictionaries()
+        lookups = _code_lookups(dictionaries)
+
+        row_groups = []
+        rows = 0
+        with open(filename, 'wb') as f:
+            f.write(COLUMNAR_MAGIC)
+            columns = [array('H') for _ in COLUMNAR_FIELDS]
+            for idea in ideas:
+                if isinstance(idea, IdeaRecord) and idea._generator is self:
+                    codes = self._record_codes(idea)
+                else:
+                    codes = [self._column_code(lookups[field], dictionaries[field], value)
+                             for field, value in zip(COLUMNAR_FIELDS, _concept_values(idea))]
+                for column, code in zip(columns, codes):
+                    column.append(code)
+                if len(columns[0]) >= row_group_size:
+                    row_groups.append(self._write_row_group(f, columns, index_fields))
+                    rows += len(columns[0])
+                    columns = [array('H') for _ in COLUMNAR_FIELDS]
+            if columns[0]:
+                row_groups.append(self._write_row_group(f, columns, index_fields))
+                rows += len(columns[0])
+
+            # The header goes at the end so dictionaries can grow while streaming
+            header = json.dumps({
+                "fields": COLUMNAR_FIELDS,
+                "dictionaries": dictionaries,
+                "row_groups": row_groups,
+                "rows": rows,
+                "byteorder": sys.byteorder
+            }).encode("utf-8")
+            f.write(header)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(COLUMNAR_MAGIC)
+
+        print(f"Saved {rows} ideas in columnar format to {filename}")
+        return rows
+
+    def column_dictionaries(self):
+        """Return the code-to-value list of every concept field, taken from the compiled catalogs"""
+        index = self.catalog_index
+        return {
+            "industry": list(index["industries"].categories),
+            "niche": list(index["industries"].items),
+            "demographic": list(index["demographics"].items),
+            "psychographic": list(index["psychographics"].items),
+            "trend": list(index["trends"].items),
+            "business_model": list(index["business_models"].items),
+            "revenue_stream": list(index["revenue_streams"].items),
+            "constraint": list(index["constraints"].items)
+        }
+
+    def _record_codes(self, record):
+        """Return a record's column codes; its leaf indices already are the dictionary codes"""
+        return (self.catalog_index["industries"].leaf_category[record.codes[0]],) + tuple(record.codes)
+
+    def _write_row_group(self, f, columns, index_fields):
+        """Write one row group's columns and bitmaps, returning its header entry"""
+        count = len(columns[0])
+        entry = [f.tell(), count, {}]
+        for column in columns:
+            column.tofile(f)
+
+        for field, column in zip(COLUMNAR_FIELDS, columns):
+            if not index_fields or field not in index_fields:
+                continue
+            positions = {}
+            for row, code in enumerate(column):
+                positions.setdefault(code, []).append(row)
+            # Bit i of a value's bitmap is set when row i of the group holds that value
+            directory = entry[2][field] = []
+            for code, rows in positions.items():
+                bitmap = bytearray((count + 7) // 8)
+                for row in rows:
+                    bitmap[row >> 3] |= 1 << (row & 7)
+                directory.append([code, f.tell(), len(bitmap)])
+                f.write(bitmap)
+
+        return entry
+
+    def _column_code(self, lookup, dictionary, value):
+        """Return the dictionary code for value, adding it to the dictionary when new"""
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(dictionary)
+            dictionary.append(value)
+        return code
+
     def print_idea(self, idea):
         """Print a formatted business idea"""
         print(f"\n{'='*50}")
@@ -277,6 +555,724 @@ class BusinessIdeaGenerator:
             self.print_idea(idea)
 
 
+class CatalogIndex:
+    """Flat, array-backed lookup table over a category -> items catalog (or a plain list)"""
+
+    def __init__(self, catalog):
+        if isinstance(catalog, list):
+            catalog = {None: catalog}
+        self.categories = list(catalog.keys())
+        self.items = []
+        # offsets[c]:offsets[c + 1] is the slice of items belonging to category c
+        self.offsets = array('I', [0])
+        self.leaf_category = array('I')
+        for c, category in enumerate(self.categories):
+            self.items.extend(catalog[category])
+            self.leaf_category.extend([c] * len(catalog[category]))
+            self.offsets.append(len(self.items))
+
+        # Cumulative leaf weights that reproduce category-then-item sampling in bulk draws
+        self.cum_weights = []
+        total = 0.0
+        for c in range(len(self.categories)):
+            size = self.offsets[c + 1] - self.offsets[c]
+            for _ in range(size):
+                total += 1.0 / (len(self.categories) * size)
+                self.cum_weights.append(total)
+
+    def __len__(self):
+        return len(self.items)
+
+    def category_of(self, leaf):
+        """Return the category name of a leaf index"""
+        return self.categories[self.leaf_category[leaf]]
+
+    def draw_table(self, uniform=False):
+        """Return leaf indices repeated so a uniform pick among them has the sampling's exact odds
+
+        Category-then-item sampling repeats each leaf lcm(category sizes) / size times,
+        which keeps every category's share equal.
+        """
+        if uniform:
+            return list(range(len(self.items)))
+        sizes = [self.offsets[c + 1] - self.offsets[c] for c in range(len(self.categories))]
+        repeat = math.lcm(*sizes)
+        table = []
+        for c, size in enumerate(sizes):
+            for leaf in range(self.offsets[c], self.offsets[c + 1]):
+                table.extend([leaf] * (repeat // size))
+        return table
+
+    def sample_indices(self, rng, count, uniform=False):
+        """Draw count leaf indices at once"""
+        if uniform:
+            return rng.choices(range(len(self.items)), k=count)
+        return rng.choices(range(len(self.items)), cum_weights=self.cum_weights, k=count)
+
+
+class IdeaRecord:
+    """A generated idea stored as catalog leaf indices, rendered to text only when read"""
+
+    __slots__ = ("_generator", "codes", "generated_at", "_rendered")
+
+    def __init__(self, generator, codes, generated_at):
+        self._generator = generator
+        # One leaf index per compiled catalog, in catalog_index order
+        self.codes = codes
+        self.generated_at = generated_at
+        self._rendered = None
+
+    def _value(self, position, catalog):
+        return self._generator.catalog_index[catalog].items[self.codes[position]]
+
+    @property
+    def industry(self):
+        return self._generator.catalog_index["industries"].category_of(self.codes[0])
+
+    @property
+    def niche(self):
+        return self._value(0, "industries")
+
+    @property
+    def demographic(self):
+        return self._value(1, "demographics")
+
+    @property
+    def psychographic(self):
+        return self._value(2, "psychographics")
+
+    @property
+    def trend(self):
+        return self._value(3, "trends")
+
+    @property
+    def business_model(self):
+        return self._value(4, "business_models")
+
+    @property
+    def revenue_stream(self):
+        return self._value(5, "revenue_streams")
+
+    @property
+    def constraint(self):
+        return self._value(6, "constraints")
+
+    @property
+    def description(self):
+        return self._generator._describe(self.niche, self.demographic, self.psychographic, self.trend, self.business_model)
+
+    @property
+    def business_name(self):
+        return self.to_dict()["business_name"]
+
+    @property
+    def value_proposition(self):
+        return self.to_dict()["value_proposition"]
+
+    @property
+    def solution(self):
+        return self.to_dict()["real_world_constraints"]["solution"]
+
+    def to_dict(self):
+        """Render the idea in the same layout as _format_idea; the random parts are fixed on first render"""
+        if self._rendered is None:
+            idea = self._generator._format_idea(self.industry, self.niche, self.demographic, self.psychographic,
+                                                self.trend, self.business_model, self.revenue_stream, self.constraint)
+            idea["generated_at"] = self.generated_at
+            self._rendered = idea
+        return self._rendered
+
+
+class ColumnarIdeaFile:
+    """Memory-mapped reader for collections written by save_columnar"""
+
+    def __init__(self, filename):
+        self._file = open(filename, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        # Every memoryview over the map, released by close() so the map can be closed
+        self._views = []
+        self._groups = []
+        if self._map[:8] != COLUMNAR_MAGIC or self._map[-8:] != COLUMNAR_MAGIC:
+            self.close()
+            raise ValueError(f"{filename} is not a columnar idea file")
+
+        try:
+            header_length = int.from_bytes(self._map[-16:-8], "little")
+            header = json.loads(self._map[-16 - header_length:-16])
+            if header["byteorder"] != sys.byteorder:
+                raise ValueError(f"{filename} was written on a {header['byteorder']}-endian machine")
+
+            self.fields = tuple(header["fields"])
+            self.dictionaries = header["dictionaries"]
+            self.rows = header["rows"]
+            self._lookups = {field: {value: code for code, value in enumerate(values)}
+                             for field, values in self.dictionaries.items()}
+            # Per row group: (first row, {field: memoryview of codes}, {field: {code: bitmap slice}})
+            first_row = 0
+            view = memoryview(self._map)
+            self._views.append(view)
+            for offset, count, directory in header["row_groups"]:
+                columns = {}
+                for position, field in enumerate(self.fields):
+                    start = offset + position * count * 2
+                    column = columns[field] = view[start:start + count * 2].cast('H')
+                    self._views.append(column)
+                bitmaps = {field: {code: (start, length) for code, start, length in entries}
+                           for field, entries in directory.items()}
+                self._groups.append((first_row, columns, bitmaps))
+                first_row += count
+        except Exception:
+            self.close()
+            raise
+
+    def __len__(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the memory map and the underlying file; open iter_column() generators stop working"""
+        self._groups = []
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        self._map.close()
+        self._file.close()
+
+    def iter_column(self, field):
+        """Yield the integer codes of one column without decoding them"""
+        for _, columns, _ in self._groups:
+            yield from columns[field]
+
+    def row(self, position):
+        """Decode a single row into a dict of concept fields"""
+        for first_row, columns, _ in reversed(self._groups):
+            if position >= first_row:
+                local = position - first_row
+                return {field: self.dictionaries[field][columns[field][local]] for field in self.fields}
+        raise IndexError(position)
+
+    def query(self, **criteria):
+        """Build a conjunctive query such as query(industry="Health", trend="Remote work")"""
+        codes = {}
+        for field, value in criteria.items():
+            if field not in self._lookups:
+                raise KeyError(f"Unknown field: {field}")
+            codes[field] = self._lookups[field].get(value)
+        return IdeaQuery(self, codes)
+
+    def filter(self, **criteria):
+        """Yield row numbers whose concept fields equal every given value"""
+        return self.query(**criteria).rows()
+
+    def _group_bitmap(self, group, codes):
+        """AND together the bitmaps of one row group, falling back to a scan for unindexed fields"""
+        _, columns, bitmaps = group
+        count = len(columns[self.fields[0]])
+        result = (1 << count) - 1
+        scanned = []
+        for field, code in codes.items():
+            if field not in bitmaps:
+                scanned.append((field, code))
+                continue
+            location = bitmaps[field].get(code)
+            if location is None:
+                # The value never occurs in this group, so none of its rows are read
+                return 0
+            start, length = location
+            result &= int.from_bytes(self._map[start:start + length], "little")
+            if not result:
+                return 0
+
+        for field, code in scanned:
+            column = columns[field]
+            matches = bytearray((count + 7) // 8)
+            for row in _bitmap_rows(result):
+                if column[row] == code:
+                    matches[row >> 3] |= 1 << (row & 7)
+            result = int.from_bytes(matches, "little")
+            if not result:
+                return 0
+        return result
+
+
+class IdeaQuery:
+    """Conjunctive equality query over a ColumnarIdeaFile, answered from its bitmap indexes"""
+
+    def __init__(self, source, codes):
+        self.source = source
+        self.codes = codes
+        self._matches = None
+
+    def _group_matches(self):
+        """Return (first row, bitmap) for every row group with at least one match"""
+        if self._matches is None:
+            self._matches = []
+            if None not in self.codes.values():
+                for group in self.source._groups:
+                    bitmap = self.source._group_bitmap(group, self.codes)
+                    if bitmap:
+                        self._matches.append((group[0], bitmap))
+        return self._matches
+
+    def count(self):
+        """Count matching rows from the bitmaps alone"""
+        return sum(bitmap.bit_count() for _, bitmap in self._group_matches())
+
+    def rows(self, offset=0, limit=None):
+        """Yield matching row numbers, skipping the first offset matches"""
+        for first_row, bitmap in self._group_matches():
+            matched = bitmap.bit_count()
+            if offset >= matched:
+                # Whole row groups are skipped by their popcount
+                offset -= matched
+                continue
+            for row in _bitmap_rows(bitmap):
+                if offset:
+                    offset -= 1
+                    continue
+                if limit is not None:
+                    if limit <= 0:
+                        return
+                    limit -= 1
+                yield first_row + row
+
+    def page(self, number, size=50):
+        """Return page number (from 0) of decoded matching rows"""
+        return [self.source.row(row) for row in self.rows(number * size, size)]
+
+
+def _bitmap_rows(bitmap):
+    """Yield the positions of the set bits of a bitmap, in ascending order"""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for byte_index, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield (byte_index << 3) + low.bit_length() - 1
+            byte ^= low
+
+
+class NameRegistry:
+    """Hands out business names that are unique within a compiled name space
+
+    A name is a catalog word, up to three syllables and a suffix. Names map one to
+    one onto integer codes, so a bitset over the code space is an exact membership
+    test with one bit per possible name.
+    """
+
+    SYLLABLES = ["ba", "be", "bo", "da", "de", "do", "ka", "ke", "ko", "la", "le", "lo", "ma", "me", "mo",
+                 "na", "ne", "no", "ra", "re", "ro", "sa", "se", "so", "ta", "te", "to", "va", "ve", "vo"]
+    SUFFIXES = ["Hub", "Go", "Ly", "ify", "Wise", "Now", "Sync", "Pulse", "Labs", "Base", "Flow", "Nest",
+                "Spark", "Works", "Loop", "Mint", "Path", "Gate", "Dock", "Verse", "Bit", "Kit", "Box", "Hive"]
+    MAX_SYLLABLES = 3
+    _FREE_BYTE = re.compile(rb"[^\xff]")
+
+    def __init__(self, words):
+        # A word that another word plus syllables and suffix could spell is folded into the shorter
+        # word, which keeps rendering one-to-one
+        self.words = []
+        self._word_index = {}
+        for word in sorted(words, key=len):
+            prefix = next((kept for kept in self.words if word.startswith(kept) and self._spellable(word[len(kept):])), None)
+            if prefix is None:
+                self._word_index[word] = len(self.words)
+                self.words.append(word)
+            else:
+                self._word_index[word] = self._word_index[prefix]
+
+        # Middle parts are numbered by length: the empty middle, then one syllable, two, three
+        self._level_start = [0]
+        for level in range(self.MAX_SYLLABLES + 1):
+            self._level_start.append(self._level_start[-1] + len(self.SYLLABLES) ** level)
+        self._middles = self._level_start[-1]
+        self._block = self._middles * len(self.SUFFIXES)
+        self.capacity = len(self.words) * self._block
+        self.bits = bytearray((self.capacity + 7) // 8)
+        self.claimed = 0
+        # A partition only claims codes with code % shards == shard
+        self.shard = 0
+        self.shards = 1
+
+    def _spellable(self, rest):
+        """Whether some syllables-plus-suffix string starts with rest"""
+        while rest[:2] in self.SYLLABLES:
+            rest = rest[2:]
+        return (not rest or any(s.startswith(rest) for s in self.SYLLABLES)
+                or any(s.startswith(rest) or rest.startswith(s) for s in self.SUFFIXES))
+
+    def __len__(self):
+        return self.claimed
+
+    def claim(self, elements, rng):
+        """Return a new unique name built from the first word of one of the elements"""
+        for element in elements:
+            word = self._word_index.get(element.split()[0])
+            if word is None:
+                continue
+            code = self._claim_in_block(word * self._block, rng)
+            if code is not None:
+                return self.render(code)
+        raise ValueError("No unique business names left for these elements")
+
+    def _claim_in_block(self, base, rng):
+        """Claim a free code in one word's block, preferring short names"""
+        suffixes = len(self.SUFFIXES)
+        for level in range(self.MAX_SYLLABLES + 1):
+            for _ in range(3):
+                middle = rng.randrange(self._level_start[level], self._level_start[level + 1])
+                code = base + middle * suffixes + rng.randrange(suffixes)
+                code += (self.shard - code) % self.shards
+                if code < base + self._block and not self.bits[code >> 3] & (1 << (code & 7)):
+                    return self._set(code)
+
+        # The block is crowded: scan from a random byte for the next free bit
+        first, last = base >> 3, (base + self._block + 7) >> 3
+        pivot = rng.randrange(first, last)
+        for start, end in ((pivot, last), (first, pivot)):
+            match = self._FREE_BYTE.search(self.bits, start, end)
+            while match:
+                position = match.start()
+                for bit in range(8):
+                    code = (position << 3) + bit
+                    if (base <= code < base + self._block and code % self.shards == self.shard
+                            and not self.bits[position] & (1 << bit)):
+                        return self._set(code)
+                match = self._FREE_BYTE.search(self.bits, position + 1, end)
+        return None
+
+    def partition(self, shard, shards):
+        """Return a copy that only claims names from one of shards disjoint parts of the name space"""
+        part = copy.copy(self)
+        part.bits = bytearray(self.bits)
+        part.claimed = 0
+        part.shard, part.shards = shard, shards
+        return part
+
+    def merge(self, part):
+        """Take over the names a partition claimed"""
+        merged = int.from_bytes(self.bits, "little") | int.from_bytes(part.bits, "little")
+        self.bits = bytearray(merged.to_bytes(len(self.bits), "little"))
+        self.claimed += part.claimed
+
+    def _set(self, code):
+        self.bits[code >> 3] |= 1 << (code & 7)
+        self.claimed += 1
+        return code
+
+    def render(self, code):
+        """Spell out the name for a code"""
+        code, suffix = divmod(code, len(self.SUFFIXES))
+        word, middle = divmod(code, self._middles)
+        level = 0
+        while middle >= self._level_start[level + 1]:
+            level += 1
+        middle -= self._level_start[level]
+        syllables = []
+        for _ in range(level):
+            middle, syllable = divmod(middle, len(self.SYLLABLES))
+            syllables.append(self.SYLLABLES[syllable])
+        return self.words[word] + "".join(syllables) + self.SUFFIXES[suffix]
+
+    def _layout(self):
+        return {"words": self.words, "syllables": self.SYLLABLES, "suffixes": self.SUFFIXES,
+                "max_syllables": self.MAX_SYLLABLES}
+
+    def save(self, filename):
+        """Persist the claimed names so later runs keep avoiding them"""
+        header = json.dumps({"layout": self._layout(), "claimed": self.claimed}).encode("utf-8")
+        with open(filename, 'wb') as f:
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            f.write(self.bits)
+
+    def load(self, filename):
+        """Load names claimed by an earlier run with the same name space"""
+        with open(filename, 'rb') as f:
+            header = json.loads(f.read(int.from_bytes(f.read(8), "little")))
+            if header["layout"] != self._layout():
+                raise ValueError(f"{filename} was written for a different name space")
+            self.bits = bytearray(f.read())
+        self.claimed = header["claimed"]
+
+
+class IdeaRanker:
+    """Keeps the k best-scoring ideas of a stream in a bounded min-heap"""
+
+    def __init__(self, generator, k=1000, chunk_size=10000):
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        self.generator = generator
+        self.k = k
+        self.chunk_size = chunk_size
+        self.dictionaries = generator.column_dictionaries()
+        self._lookups = _code_lookups(self.dictionaries)
+        # Per field: weight by code, with the default last so unknown values (code -1) land on it
+        self._tables = {}
+        self._scorers = []
+
+    def add_field_weights(self, field, weights, default=0.0):
+        """Score a concept field by a {value: weight} mapping"""
+        if field not in self.dictionaries:
+            raise KeyError(f"Unknown field: {field}")
+        self._tables[field] = [weights.get(value, default) for value in self.dictionaries[field]] + [default]
+        return self
+
+    def add_scorer(self, scorer):
+        """Add scorer(columns) -> scores, where columns maps each field to a list of codes for one chunk"""
+        self._scorers.append(scorer)
+        return self
+
+    def score_columns(self, columns, size):
+        """Score one chunk of code columns"""
+        scores = [0.0] * size
+        for field, table in self._tables.items():
+            scores = [score + table[code] for score, code in zip(scores, columns[field])]
+        for scorer in self._scorers:
+            scores = [score + extra for score, extra in zip(scores, scorer(columns))]
+        return scores
+
+    def rank(self, ideas):
+        """Return the top k (score, idea) pairs of any iterable of ideas or IdeaRecords, best first"""
+        heap = []
+        sequence = 0
+        ideas = iter(ideas)
+        while True:
+            chunk = list(islice(ideas, self.chunk_size))
+            if not chunk:
+                break
+            scores = self.score_columns(self._columns(chunk), len(chunk))
+            for score, idea in zip(scores, chunk):
+                # Earlier ideas win ties, and ideas themselves are never compared
+                item = (score, -sequence, idea)
+                sequence += 1
+                if len(heap) < self.k:
+                    heapq.heappush(heap, item)
+                elif item[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, item)
+
+        heap.sort(key=lambda item: item[:2], reverse=True)
+        return [(score, idea) for score, _, idea in heap]
+
+    def _columns(self, chunk):
+        """Turn a chunk of ideas into code columns"""
+        rows = []
+        for idea in chunk:
+            if isinstance(idea, IdeaRecord) and idea._generator is self.generator:
+                rows.append(self.generator._record_codes(idea))
+            else:
+                rows.append([self._lookups[field].get(value, -1)
+                             for field, value in zip(COLUMNAR_FIELDS, _concept_values(idea))])
+        return dict(zip(COLUMNAR_FIELDS, (list(column) for column in zip(*rows))))
+
+
+def _code_lookups(dictionaries):
+    """Map each field's values back to their first code"""
+    lookups = {field: {} for field in dictionaries}
+    for field, values in dictionaries.items():
+        for code, value in enumerate(values):
+            lookups[field].setdefault(value, code)
+    return lookups
+
+
+def _concept_values(idea):
+    """Return an idea dict's or IdeaRecord's concept fields in COLUMNAR_FIELDS order"""
+    if isinstance(idea, IdeaRecord):
+        # Records from another generator: read values through their own catalogs
+        return (idea.industry, idea.niche, idea.demographic, idea.psychographic, idea.trend,
+                idea.business_model, idea.revenue_stream, idea.constraint)
+    concept = idea["concept"]
+    return (concept["industry"], concept["niche"], concept["target_audience"]["demographic"],
+            concept["target_audience"]["psychographic"], concept["trend"], concept["business_model"],
+            concept["revenue_stream"], idea["real_world_constraints"]["challenge"])
+
+
+class IdeaBatcher:
+    """Coalesces concurrent single-idea requests into batched generation calls"""
+
+    def __init__(self, generator, max_batch=256, max_delay=0.002):
+        self.generator = generator
+        self.max_batch = max_batch
+        # Upper bound on how long a request waits for others to join its batch
+        self.max_delay = max_delay
+        self._pending = []
+        self._timer = None
+
+    def submit(self, method, **kwargs):
+        """Queue a request for generate_idea_from_<method> and return a future for its idea"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((method, kwargs, future))
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self.flush)
+        return future
+
+    def flush(self):
+        """Generate every pending idea now"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+
+        # Requests without parameters are all served by one bulk draw
+        plain = [future for _, kwargs, future in batch if not kwargs]
+        if plain:
+            try:
+                ideas = self.generator.generate_batch(len(plain))
+            except Exception as error:
+                ideas = None
+                for future in plain:
+                    if not future.cancelled():
+                        future.set_exception(error)
+            for future, idea in zip(plain, ideas or []):
+                if not future.cancelled():
+                    future.set_result(idea)
+
+        # A failing request resolves its own future and leaves the rest of the batch alone
+        for method, kwargs, future in batch:
+            if not kwargs or future.cancelled():
+                continue
+            try:
+                future.set_result(getattr(self.generator, f"generate_idea_from_{method}")(**kwargs))
+            except Exception as error:
+                future.set_exception(error)
+
+
+class IdeaService:
+    """Minimal HTTP/1.1 service exposing idea generation over asyncio streams"""
+
+    # Query parameters each single-idea endpoint accepts
+    ROUTES = {
+        "/ideas/industry": ("industry", ("industry", "niche")),
+        "/ideas/audience": ("audience", ("demographic", "psychographic")),
+        "/ideas/trend": ("trend", ("trend",))
+    }
+
+    def __init__(self, generator=None, max_collection=10_000_000, chunk_size=1000):
+        self.generator = generator or BusinessIdeaGenerator()
+        self.batcher = IdeaBatcher(self.generator)
+        self.max_collection = max_collection
+        self.chunk_size = chunk_size
+
+    async def serve(self, host="127.0.0.1", port=8000):
+        """Serve requests until cancelled"""
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Serving business ideas on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    async def handle_connection(self, reader, writer):
+        """Answer requests on one connection, keeping it alive between requests"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if "content-length" in headers:
+                    await reader.readexactly(int(headers["content-length"]))
+
+                keep_alive = version.strip() == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                await self.handle_request(method, target, writer, keep_alive)
+                if not keep_alive:
+                    break
+        except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, method, target, writer, keep_alive):
+        """Route a single request"""
+        url = urlsplit(target)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        if method != "GET":
+            await self._send_json(writer, 405, {"error": "Only GET is supported"}, keep_alive)
+        elif url.path in self.ROUTES:
+            kind, allowed = self.ROUTES[url.path]
+            kwargs = {key: params[key] for key in allowed if params.get(key)}
+            error = self._invalid_parameters(kwargs)
+            if error:
+                await self._send_json(writer, 400, {"error": error}, keep_alive)
+                return
+            try:
+                idea = await self.batcher.submit(kind, **kwargs)
+            except Exception as error:
+                await self._send_json(writer, 500, {"error": f"Idea generation failed: {error}"}, keep_alive)
+                return
+            await self._send_json(writer, 200, idea, keep_alive)
+        elif url.path == "/collection":
+            await self._stream_collection(writer, params, keep_alive)
+        else:
+            await self._send_json(writer, 404, {"error": f"Unknown path: {url.path}"}, keep_alive)
+
+    def _invalid_parameters(self, kwargs):
+        """Return an error message if an industry or niche is not in the catalogs"""
+        industry, niche = kwargs.get("industry"), kwargs.get("niche")
+        if niche and not industry:
+            return "niche requires an industry"
+        if industry and industry not in self.generator.industries:
+            return f"Unknown industry: {industry}"
+        if niche and niche not in self.generator.industries[industry]:
+            return f"Unknown niche for {industry}: {niche}"
+        return None
+
+    async def _stream_collection(self, writer, params, keep_alive):
+        """Stream a collection as chunked newline-delimited JSON"""
+        count = params.get("count", "5")
+        method = params.get("method", "mixed")
+        if not count.isdigit() or not 0 < int(count) <= self.max_collection:
+            await self._send_json(writer, 400, {"error": f"count must be between 1 and {self.max_collection}"}, keep_alive)
+            return
+
+        writer.write(self._head(200, "application/x-ndjson", keep_alive, {"Transfer-Encoding": "chunked"}))
+        remaining = int(count)
+        while remaining > 0:
+            size = min(self.chunk_size, remaining)
+            chunk = "".join(json.dumps(idea) + "\n" for idea in self.generator.generate_collection(size, method, batch=True))
+            data = chunk.encode("utf-8")
+            writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+            # Wait for the client to keep up before generating the next chunk
+            await writer.drain()
+            remaining -= size
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _send_json(self, writer, status, body, keep_alive):
+        data = json.dumps(body).encode("utf-8")
+        writer.write(self._head(status, "application/json", keep_alive, {"Content-Length": str(len(data))}) + data)
+        await writer.drain()
+
+    def _head(self, status, content_type, keep_alive, extra):
+        reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                   500: "Internal Server Error"}
+        lines = [f"HTTP/1.1 {status} {reasons[status]}", f"Content-Type: {content_type}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines.extend(f"{name}: {value}" for name, value in extra.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def _generate_shard(args):
+    """Worker entry point for generate_collection_parallel"""
+    catalogs, seed, count, method, batch, *registry = args
+    generator = BusinessIdeaGenerator(seed=seed)
+    generator.__dict__.update(catalogs)
+    generator.compile_catalogs()
+    generator.name_registry = registry[0] if registry else None
+    return generator.generate_collection(count, method, batch=batch), generator.name_registry
+
+
 def main():
     generator = BusinessIdeaGenerator()
     
@@ -408,7 +1404,10 @@ def main():
             if save == "y":
                 filename = input("Enter filename (default: business_ideas.json): ")
                 filename = filename if filename.strip() else "business_ideas.json"
-                generator.save_collection(collection, filename)
+                if filename.endswith((".jsonl", ".jsonl.gz")):
+                    generator.save_collection_stream(collection, filename)
+                else:
+                    generator.save_collection(collection, filename)
                 
         elif choice == "5":
             print("\nThank you for using the Business Idea Generator!")
@@ -419,4 +1418,8 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        port = int(sys.argv[2]) if len(sys.argv) > 2 else 8000
+        asyncio.run(IdeaService().serve(port=port))
+    else:
+        main()
@@ -1,16 +1,41 @@
 import random
 import json
+import heapq
+import math
+import mmap
 import os
+import re
+import sys
+from array import array
+from collections import deque
 from datetime import datetime
 
+KNOWLEDGE_INDEX_MAGIC = b"KBINDEX1"
+
+# Words too common to help retrieval; dropped from articles and queries alike
+STOPWORDS = frozenset([
+    "a", "an", "and", "are", "about", "can", "do", "does", "for", "how", "i", "in", "is", "it", "me",
+    "of", "on", "or", "please", "tell", "that", "the", "this", "to", "was", "what", "who", "with", "you", "your"
+])
+
 class ConversationalAI:
-    def _init_(self, name="Assistant"):
+    # Keywords for the intents that are not backed by a data source
+    FUN_KEYWORDS = ["joke", "fun", "play", "game", "entertain"]
+    GREETINGS = ["hello", "hi", "hey", "greetings"]
+    FAREWELLS = ["bye", "goodbye", "see you", "farewell"]
+    
+    def __init__(self, name="Assistant"):
         self.name = name
         self.conversation_history = []
         self.user_profile = {}
         self.mode = "general"  # Modes: general, faq, fun, knowledge
         self.faq_data = self._load_faq_data()
         self.knowledge_base = self._load_knowledge_base()
+        # Compiled from faq_data and knowledge_base on first use, see _intent_automaton()
+        self._intent_matcher = None
+        self._intent_sources = None
+        # Optional on-disk retrieval index, see load_knowledge_index()
+        self.knowledge_index = None
         
         # Prompt templates for different conversation flows
         self.prompts = {
@@ -71,38 +96,81 @@ class ConversationalAI:
         """Determine the user's intent from their input"""
         user_input = user_input.lower()
         
-        # Check if it's a FAQ
-        for question in self.faq_data.keys():
-            if question in user_input:
+        # One pass over the input finds the highest-priority pattern it contains
+        match = self._intent_automaton().match(user_input)
+        if match is not None:
+            kind, key = match
+            if kind == "faq":
                 self.mode = "faq"
-                return {"type": "faq", "question": question}
-        
-        # Check if it's a knowledge request
-        for topic in self.knowledge_base.keys():
-            if topic in user_input:
+                return {"type": "faq", "question": key}
+            if kind == "knowledge":
                 self.mode = "knowledge"
-                return {"type": "knowledge", "topic": topic}
-        
-        # Check if it's a fun conversation request
-        fun_keywords = ["joke", "fun", "play", "game", "entertain"]
-        if any(keyword in user_input for keyword in fun_keywords):
-            self.mode = "fun"
-            return {"type": "fun"}
-        
-        # Check for greetings
-        greetings = ["hello", "hi", "hey", "greetings"]
-        if any(greeting in user_input for greeting in greetings):
-            return {"type": "greeting"}
-        
-        # Check for farewells
-        farewells = ["bye", "goodbye", "see you", "farewell"]
-        if any(farewell in user_input for farewell in farewells):
-            return {"type": "farewell"}
+                return {"type": "knowledge", "topic": key}
+            if kind == "fun":
+                self.mode = "fun"
+            return {"type": kind}
         
         # Default to general conversation
         self.mode = "general"
         return {"type": "general", "input": user_input}
     
+    @property
+    def faq_data(self):
+        return self._faq_data
+    
+    @faq_data.setter
+    def faq_data(self, data):
+        # Stored as a VersionedDict so any later edit marks the intent matcher stale
+        self._faq_data = data if isinstance(data, VersionedDict) else VersionedDict(data)
+    
+    @property
+    def knowledge_base(self):
+        return self._knowledge_base
+    
+    @knowledge_base.setter
+    def knowledge_base(self, data):
+        self._knowledge_base = data if isinstance(data, VersionedDict) else VersionedDict(data)
+    
+    def _intent_automaton(self):
+        """Return the intent matcher, recompiling it if the FAQ or knowledge base has changed"""
+        # The dicts themselves are kept, not their ids, so a replacement can never look unchanged
+        faq, knowledge = self._faq_data, self._knowledge_base
+        sources = self._intent_sources
+        if (self._intent_matcher is None or sources[0] is not faq or sources[1] != faq.version
+                or sources[2] is not knowledge or sources[3] != knowledge.version):
+            # Priorities follow the old check order: FAQ entries, topics, then the keyword groups
+            matcher = IntentMatcher()
+            priority = 0
+            for question in self.faq_data:
+                matcher.add(question, priority, ("faq", question))
+                priority += 1
+            for topic in self.knowledge_base:
+                matcher.add(topic, priority, ("knowledge", topic))
+                priority += 1
+            for kind, keywords in (("fun", self.FUN_KEYWORDS), ("greeting", self.GREETINGS), ("farewell", self.FAREWELLS)):
+                for keyword in keywords:
+                    matcher.add(keyword, priority, (kind, None))
+                priority += 1
+            matcher.build()
+            self._intent_matcher = matcher
+            self._intent_sources = (faq, faq.version, knowledge, knowledge.version)
+        return self._intent_matcher
+    
+    def load_knowledge_index(self, filename="knowledge_index.kbi", min_score=0.0):
+        """Answer general questions from an index written by build_knowledge_index()"""
+        if self.knowledge_index is not None:
+            self.knowledge_index.close()
+        self.knowledge_index = KnowledgeIndex(filename, min_score)
+        return self.knowledge_index
+    
+    def add_faq(self, question, answer):
+        """Add or replace a FAQ entry"""
+        self.faq_data[question] = answer
+    
+    def add_knowledge(self, topic, info):
+        """Add or replace a knowledge base entry"""
+        self.knowledge_base[topic] = info
+    
     def generate_response(self, user_input):
         """Generate a response based on user input and conversation history"""
         # Add user input to conversation history
@@ -135,8 +203,14 @@ class ConversationalAI:
             response += " How about I tell you a joke? Why don't scientists trust atoms? Because they make up everything!"
         
         else:  # general conversation
+            article = self.knowledge_index.best_match(user_input) if self.knowledge_index is not None else None
+            if article is not None:
+                # No exact topic, but the retrieval index has a relevant article
+                self.mode = "knowledge"
+                prompt = random.choice(self.prompts["knowledge_mode"])
+                response = f"{prompt} {article[1]}"
             # Check if we can use context from previous conversation
-            if len(self.conversation_history) > 2:
+            elif len(self.conversation_history) > 2:
                 previous_topics = self._extract_topics_from_history()
                 if previous_topics:
                     previous_topic = random.choice(previous_topics)
@@ -183,6 +257,300 @@ class ConversationalAI:
                 self.conversation_history = json.load(f)
 
 
+class VersionedDict(dict):
+    """dict that counts its mutations, so anything compiled from it can tell when it is stale"""
+    
+    # Class default, so unpickling (which fills the dict before any __init__) works too
+    version = 0
+    
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version += 1
+    
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+    
+    def __ior__(self, other):
+        self.update(other)
+        return self
+    
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.version += 1
+    
+    def setdefault(self, key, default=None):
+        self.version += 1
+        return super().setdefault(key, default)
+    
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+    
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+    
+    def clear(self):
+        super().clear()
+        self.version += 1
+
+
+class IntentMatcher:
+    """Aho-Corasick automaton reporting the best-priority pattern found in a text
+
+    Every pattern carries a priority (lower wins) and a value. match() walks
+    the text once, whatever the number of patterns.
+    """
+    
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        # (priority, value) of the pattern ending exactly at each node
+        self.output = [None]
+        # Best output at each node or any of its suffixes, filled in by build()
+        self.best = [None]
+        self._built = False
+    
+    def add(self, pattern, priority, value):
+        """Add a pattern; if it was already added, the lower priority is kept"""
+        node = 0
+        for char in pattern:
+            child = self.goto[node].get(char)
+            if child is None:
+                child = len(self.goto)
+                self.goto[node][char] = child
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+            node = child
+        if self.output[node] is None or priority < self.output[node][0]:
+            self.output[node] = (priority, value)
+        self._built = False
+    
+    def build(self):
+        """Compute failure links breadth-first and fold suffix matches into each node"""
+        self.best = list(self.output)
+        queue = deque(self.goto[0].values())
+        for node in queue:
+            self.fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            inherited = self.best[self.fail[node]]
+            if inherited is not None and (self.best[node] is None or inherited[0] < self.best[node][0]):
+                self.best[node] = inherited
+            for char, child in self.goto[node].items():
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(char, 0)
+                queue.append(child)
+        self._built = True
+    
+    def match(self, text):
+        """Return the value of the lowest-priority pattern occurring in text, or None"""
+        if not self._built:
+            self.build()
+        goto, fail, best = self.goto, self.fail, self.best
+        node = 0
+        found = best[0]
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            hit = best[node]
+            if hit is not None and (found is None or hit[0] < found[0]):
+                found = hit
+        return found[1] if found is not None else None
+
+
+def _tokenize(text):
+    """Lowercase word tokens without stopwords"""
+    return [token for token in re.findall(r"\w+", text.lower()) if token not in STOPWORDS]
+
+
+def _write_section(f, sections, name, data):
+    """Write an array or bytes 8-byte aligned and record where it went"""
+    f.write(b"\0" * (-f.tell() % 8))
+    data = data.tobytes() if isinstance(data, array) else data
+    sections[name] = [f.tell(), len(data)]
+    f.write(data)
+
+
+def build_knowledge_index(articles, filename="knowledge_index.kbi", k1=1.2, b=0.75):
+    """Write a BM25 index of (topic, text) pairs, or of a topic -> text dict, to a memory-mappable file
+
+    Article text is stored in the file as well, so a KnowledgeIndex never needs
+    the corpus in memory. Only the postings are held in memory while building.
+    """
+    if isinstance(articles, dict):
+        articles = articles.items()
+    postings = {}  # term -> (doc IDs, term frequencies)
+    # Topic starts at 2 * doc, text at 2 * doc + 1, relative to the articles section
+    article_offsets = array('Q', [0])
+    lengths = array('I')
+    sections = {}
+
+    with open(filename, 'wb') as f:
+        f.write(KNOWLEDGE_INDEX_MAGIC)
+        start = f.tell()
+        for doc, (topic, text) in enumerate(articles):
+            for part in (topic, text):
+                data = part.encode("utf-8")
+                f.write(data)
+                article_offsets.append(article_offsets[-1] + len(data))
+            counts = {}
+            # Topic words count twice so an article is found by its subject first
+            for token in _tokenize(topic) * 2 + _tokenize(text):
+                counts[token] = counts.get(token, 0) + 1
+            lengths.append(sum(counts.values()))
+            for term, frequency in counts.items():
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = (array('I'), array('I'))
+                entry[0].append(doc)
+                entry[1].append(frequency)
+        sections["articles"] = [start, article_offsets[-1]]
+        documents = len(lengths)
+        average_length = sum(lengths) / documents if documents else 0.0
+
+        # Length normalization depends only on the document, so it is stored precomputed
+        norms = array('d', (k1 * (1 - b + b * length / (average_length or 1)) for length in lengths))
+
+        # Terms sorted by code point, which is also UTF-8 byte order, for binary search on the raw bytes
+        terms = sorted(postings)
+        term_bytes = bytearray()
+        term_offsets = array('Q', [0])
+        posting_offsets = array('Q', [0])
+        docs = array('I')
+        frequencies = array('I')
+        for term in terms:
+            term_bytes += term.encode("utf-8")
+            term_offsets.append(len(term_bytes))
+            term_docs, term_frequencies = postings.pop(term)
+            docs.extend(term_docs)
+            frequencies.extend(term_frequencies)
+            posting_offsets.append(len(docs))
+
+        for name, data in (("article_offsets", article_offsets), ("norms", norms), ("terms", bytes(term_bytes)),
+                           ("term_offsets", term_offsets), ("posting_offsets", posting_offsets),
+                           ("docs", docs), ("frequencies", frequencies)):
+            _write_section(f, sections, name, data)
+
+        header = json.dumps({
+            "documents": documents,
+            "terms": len(terms),
+            "k1": k1,
+            "sections": sections,
+            "byteorder": sys.byteorder
+        }).encode("utf-8")
+        f.write(header)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(KNOWLEDGE_INDEX_MAGIC)
+
+    print(f"Indexed {documents} articles to {filename}")
+    return documents
+
+
+class KnowledgeIndex:
+    """Memory-mapped BM25 reader for indexes written by build_knowledge_index"""
+
+    def __init__(self, filename, min_score=0.0):
+        self.min_score = min_score
+        self._file = open(filename, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:8] != KNOWLEDGE_INDEX_MAGIC or self._map[-8:] != KNOWLEDGE_INDEX_MAGIC:
+            self.close()
+            raise ValueError(f"{filename} is not a knowledge index")
+
+        header_length = int.from_bytes(self._map[-16:-8], "little")
+        header = json.loads(self._map[-16 - header_length:-16])
+        if header["byteorder"] != sys.byteorder:
+            self.close()
+            raise ValueError(f"{filename} was written on a {header['byteorder']}-endian machine")
+
+        self.documents = header["documents"]
+        self.terms = header["terms"]
+        self.k1 = header["k1"]
+        self._sections = header["sections"]
+        self._view = memoryview(self._map)
+        self._article_offsets = self._section("article_offsets", 'Q')
+        self._norms = self._section("norms", 'd')
+        self._term_offsets = self._section("term_offsets", 'Q')
+        self._posting_offsets = self._section("posting_offsets", 'Q')
+        self._docs = self._section("docs", 'I')
+        self._frequencies = self._section("frequencies", 'I')
+
+    def _section(self, name, typecode):
+        start, length = self._sections[name]
+        return self._view[start:start + length].cast(typecode)
+
+    def __len__(self):
+        return self.documents
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the memory map and the underlying file"""
+        for name in ("_article_offsets", "_norms", "_term_offsets", "_posting_offsets", "_docs", "_frequencies", "_view"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        self._map.close()
+        self._file.close()
+
+    def _postings(self, term):
+        """Binary search the term dictionary; return (doc IDs, frequencies) or None"""
+        key = term.encode("utf-8")
+        terms_start = self._sections["terms"][0]
+        offsets = self._term_offsets
+        low, high = 0, self.terms
+        while low < high:
+            middle = (low + high) // 2
+            candidate = self._map[terms_start + offsets[middle]:terms_start + offsets[middle + 1]]
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                first, last = self._posting_offsets[middle], self._posting_offsets[middle + 1]
+                return self._docs[first:last], self._frequencies[first:last]
+        return None
+
+    def search(self, query, limit=5):
+        """Return up to limit (score, doc) pairs for the query, best first"""
+        scores = {}
+        norms, k1 = self._norms, self.k1
+        for term in set(_tokenize(query)):
+            postings = self._postings(term)
+            if postings is None:
+                continue
+            docs, frequencies = postings
+            df = len(docs)
+            idf = math.log(1 + (self.documents - df + 0.5) / (df + 0.5))
+            for doc, frequency in zip(docs, frequencies):
+                scores[doc] = scores.get(doc, 0.0) + idf * frequency * (k1 + 1) / (frequency + norms[doc])
+        return heapq.nlargest(limit, ((score, doc) for doc, score in scores.items()))
+
+    def article(self, doc):
+        """Decode one article as (topic, text)"""
+        start = self._sections["articles"][0]
+        topic_start, text_start, end = self._article_offsets[2 * doc:2 * doc + 3]
+        return (self._map[start + topic_start:start + text_start].decode("utf-8"),
+                self._map[start + text_start:start + end].decode("utf-8"))
+
+    def best_match(self, query):
+        """Return the best article for the query as (topic, text), or None if nothing scores above min_score"""
+        hits = self.search(query, 1)
+        if not hits or hits[0][0] <= self.min_score:
+            return None
+        return self.article(hits[0][1])
+
+
 # Example usage demonstrating the flow of prompts
 def simulate_conversation():
     chatbot = ConversationalAI(name="Chatty")
@@ -227,5 +595,5 @@ def simulate_conversation():
     chatbot.save_conversation()
 
 
-if _name_ == "_main_":
+if __name__ == "__main__":
     simulate_conversation()
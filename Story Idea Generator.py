@@ -1,9 +1,115 @@
 import random
 import json
-from typing import List, Dict, Any, Optional
+import codecs
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from bisect import bisect_left
+from itertools import combinations, islice
+from typing import List, Dict, Any, Optional, Tuple, Union, Iterable, Iterator
+
+
+class VersionedList(list):
+    """list that counts its in-place mutations, so a table compiled from it can tell when it is stale"""
+
+    # Class default, so unpickling (which fills the list before any __init__) works too
+    version = 0
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self.version += 1
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self.version += 1
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def __imul__(self, factor):
+        result = super().__imul__(factor)
+        self.version += 1
+        return result
+
+    def append(self, value):
+        super().append(value)
+        self.version += 1
+
+    def extend(self, values):
+        super().extend(values)
+        self.version += 1
+
+    def insert(self, index, value):
+        super().insert(index, value)
+        self.version += 1
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def remove(self, value):
+        self.version += 1
+        super().remove(value)
+
+    def clear(self):
+        super().clear()
+        self.version += 1
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self.version += 1
+
+    def reverse(self):
+        super().reverse()
+        self.version += 1
+
+
+class VersionedListAttribute:
+    """Instance attribute that stores whatever list is assigned to it as a VersionedList"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return instance.__dict__[self.name]
+
+    def __set__(self, instance, values):
+        instance.__dict__[self.name] = values if isinstance(values, VersionedList) else VersionedList(values)
+
 
 class StoryIdeaGenerator:
-    def __init__(self):
+    # Story element keys, in the order used for index tuples
+    ELEMENT_KEYS = ("genre", "character_type", "plot_device", "setting", "theme", "conflict")
+    # Attribute holding each element's list of values
+    ELEMENT_ATTRS = {
+        "genre": "genres",
+        "character_type": "character_types",
+        "plot_device": "plot_devices",
+        "setting": "settings",
+        "theme": "themes",
+        "conflict": "conflicts"
+    }
+    # Any list assigned to these is stored as a VersionedList, so editing it in place marks its alias table stale
+    genres = VersionedListAttribute()
+    character_types = VersionedListAttribute()
+    plot_devices = VersionedListAttribute()
+    settings = VersionedListAttribute()
+    themes = VersionedListAttribute()
+    conflicts = VersionedListAttribute()
+
+    def __init__(self, history: Optional["SQLiteStoryHistory"] = None, seed: Optional[Any] = None):
+        # Private RNG when seeded, so runs (and worker shards) are reproducible
+        self.rng = random.Random(seed) if seed is not None else random
+        
         # Initialize with various story elements
         self.genres = [
             "Fantasy", "Science Fiction", "Mystery", "Romance", "Horror", 
@@ -37,35 +143,103 @@ class StoryIdeaGenerator:
             "Person vs. Fate", "Person vs. Machine", "Person vs. God", "Person vs. Reality"
         ]
         
-        # Store generated stories for potential sequels
-        self.story_history: List[Dict[str, Any]] = []
+        # Candidate values evolve_narrative draws from in each direction
+        self.direction_profiles: Dict[str, Dict[str, List[str]]] = {
+            "darker": {
+                "genre": ["Horror", "Thriller", "Mystery", "Drama"],
+                "theme": ["Betrayal", "Survival", "Power", "Justice"],
+                "conflict": ["Person vs. Person", "Person vs. Self", "Person vs. Society"]
+            },
+            "hopeful": {
+                "genre": ["Fantasy", "Adventure", "Romance", "Comedy"],
+                "theme": ["Love", "Redemption", "Freedom", "Family"],
+                "conflict": ["Person vs. Nature", "Person vs. Technology", "Person vs. Fate"]
+            },
+            "complex": {
+                "genre": ["Science Fiction", "Historical Fiction", "Mystery", "Drama"],
+                "theme": ["Identity", "Power", "Justice", "Reality"],
+                "conflict": ["Person vs. Society", "Person vs. Reality", "Person vs. Self"]
+            },
+            "action": {
+                "genre": ["Adventure", "Thriller", "Science Fiction", "Fantasy"],
+                "theme": ["Survival", "Justice", "Power", "Freedom"],
+                "conflict": ["Person vs. Person", "Person vs. Nature", "Person vs. Supernatural"]
+            }
+        }
+        
+        # Optional sampling weights, compiled into alias tables on first use
+        self.element_weights: Dict[str, Dict[str, float]] = {}
+        self.direction_weights: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._alias_tables: Dict[Any, AliasTable] = {}
+        
+        self._prompt_templates = [PromptTemplate(text, self.ELEMENT_KEYS) for text in self.PROMPT_TEMPLATES]
+        self._sequel_templates = [PromptTemplate(text, self.DERIVED_KEYS) for text in self.SEQUEL_TEMPLATES]
+        self._evolution_templates = {direction: [PromptTemplate(text, self.DERIVED_KEYS) for text in texts]
+                                     for direction, texts in self.EVOLUTION_TEMPLATES.items()}
+        # Element slots a variation changes: 2 or 3 of them with equal odds, any subset of that size equally likely
+        pairs = list(combinations(range(len(self.ELEMENT_KEYS)), 2))
+        triples = list(combinations(range(len(self.ELEMENT_KEYS)), 3))
+        self._change_patterns = pairs * len(triples) + triples * len(pairs)
+        
+        # Store generated stories for potential sequels, in memory unless a backend is given
+        self.story_history: Union[List[Dict[str, Any]], SQLiteStoryHistory] = history if history is not None else []
+        # Which story each sequel or evolution was derived from
+        self.lineage = StoryLineage()
+        self._rebuild_lineage()
+        # Set by enable_similarity_index() to index stories as they are added
+        self.similarity_index: Optional[StorySimilarityIndex] = None
+        # Set by enable_profiling() while the profiled stages are wrapped
+        self.profiler: Optional[StoryProfiler] = None
 
     def generate_basic_idea(self) -> Dict[str, str]:
         """Generate a basic story idea with random elements"""
-        return {
-            "genre": random.choice(self.genres),
-            "character_type": random.choice(self.character_types),
-            "plot_device": random.choice(self.plot_devices),
-            "setting": random.choice(self.settings),
-            "theme": random.choice(self.themes),
-            "conflict": random.choice(self.conflicts)
-        }
+        return {key: self._element_table(key).draw(self.rng) for key in self.ELEMENT_KEYS}
+
+    def set_element_weights(self, key: str, weights: Dict[str, float]):
+        """Weight the values of one element list; values left out keep a weight of 1"""
+        self.element_weights[key] = weights
+        self._alias_tables.pop(key, None)
+
+    def set_direction_weights(self, direction: str, key: str, weights: Dict[str, float]):
+        """Weight the candidates evolve_narrative picks for one element in one direction"""
+        self.direction_weights.setdefault(direction, {})[key] = weights
+        self._alias_tables.pop((direction, key), None)
+
+    def _element_table(self, key: str) -> "AliasTable":
+        """Return the alias table of an element list, rebuilding it only after a change"""
+        values = getattr(self, self.ELEMENT_ATTRS[key])
+        table = self._alias_tables.get(key)
+        if table is None or table.stale(values):
+            weights = self.element_weights.get(key, {})
+            table = self._alias_tables[key] = AliasTable(values, [weights.get(value, 1.0) for value in values])
+        return table
+
+    def _direction_table(self, direction: str, key: str) -> "AliasTable":
+        """Return the alias table of one element's candidates in an evolution direction"""
+        values = self.direction_profiles[direction][key]
+        table = self._alias_tables.get((direction, key))
+        if table is None or table.stale(values):
+            weights = self.direction_weights.get(direction, {}).get(key, {})
+            table = self._alias_tables[(direction, key)] = AliasTable(values, [weights.get(value, 1.0) for value in values])
+        return table
     
+    # Prompt templates; a "_l" suffix inserts the element in lower case
+    PROMPT_TEMPLATES = [
+        "In a {setting}, a {character_type_l} faces {conflict_l} while pursuing {plot_device_l} in this {genre_l} tale about {theme_l}.",
+        
+        "A {genre} story where a {character_type_l} in {setting} must overcome {conflict_l} to achieve {plot_device_l}, exploring the theme of {theme_l}.",
+        
+        "What happens when a {character_type_l} confronts {conflict_l} in {setting}? This {genre_l} explores {theme_l} through the lens of {plot_device_l}.",
+        
+        "The {setting} becomes the backdrop for a {genre_l} where {theme_l} is tested when a {character_type_l} experiences {plot_device_l} amid {conflict_l}.",
+        
+        "A tale of {theme_l} unfolds in this {genre_l} set in {setting}, following a {character_type_l} who encounters {conflict_l} during {plot_device_l}."
+    ]
+
     def create_prompt(self, elements: Dict[str, str]) -> str:
         """Create a story prompt based on the given elements"""
-        prompts = [
-            f"In a {elements['setting']}, a {elements['character_type'].lower()} faces {elements['conflict'].lower()} while pursuing {elements['plot_device'].lower()} in this {elements['genre'].lower()} tale about {elements['theme'].lower()}.",
-            
-            f"A {elements['genre']} story where a {elements['character_type'].lower()} in {elements['setting']} must overcome {elements['conflict'].lower()} to achieve {elements['plot_device'].lower()}, exploring the theme of {elements['theme'].lower()}.",
-            
-            f"What happens when a {elements['character_type'].lower()} confronts {elements['conflict'].lower()} in {elements['setting']}? This {elements['genre'].lower()} explores {elements['theme'].lower()} through the lens of {elements['plot_device'].lower()}.",
-            
-            f"The {elements['setting']} becomes the backdrop for a {elements['genre'].lower()} where {elements['theme'].lower()} is tested when a {elements['character_type'].lower()} experiences {elements['plot_device'].lower()} amid {elements['conflict'].lower()}.",
-            
-            f"A tale of {elements['theme'].lower()} unfolds in this {elements['genre'].lower()} set in {elements['setting']}, following a {elements['character_type'].lower()} who encounters {elements['conflict'].lower()} during {elements['plot_device'].lower()}."
-        ]
-        
-        return random.choice(prompts)
+        # Pick the template first so only one prompt is rendered
+        return self.rng.choice(self._prompt_templates).render(elements)
     
     def generate_variations(self, base_idea: Dict[str, str], count: int = 3) -> List[str]:
         """Generate variations of a story idea"""
@@ -75,184 +249,1017 @@ class StoryIdeaGenerator:
         for _ in range(count):
             # Modify 2-3 elements to create a variation
             elements = original_elements.copy()
-            num_changes = random.randint(2, 3)
-            keys_to_change = random.sample(list(elements.keys()), num_changes)
+            num_changes = self.rng.randint(2, 3)
+            keys_to_change = self.rng.sample(list(elements.keys()), num_changes)
             
             for key in keys_to_change:
-                if key == "genre":
-                    elements[key] = random.choice([g for g in self.genres if g != elements[key]])
-                elif key == "character_type":
-                    elements[key] = random.choice([c for c in self.character_types if c != elements[key]])
-                elif key == "plot_device":
-                    elements[key] = random.choice([p for p in self.plot_devices if p != elements[key]])
-                elif key == "setting":
-                    elements[key] = random.choice([s for s in self.settings if s != elements[key]])
-                elif key == "theme":
-                    elements[key] = random.choice([t for t in self.themes if t != elements[key]])
-                elif key == "conflict":
-                    elements[key] = random.choice([c for c in self.conflicts if c != elements[key]])
+                elements[key] = self._draw_other(key, elements[key])
             
             variations.append(self.create_prompt(elements))
         
         return variations
     
-    def generate_sequel_idea(self, original_story: Dict[str, Any]) -> Dict[str, Any]:
-        """Generate a sequel based on an original story"""
-        # Extract elements from the original story
-        elements = original_story["elements"].copy()
-        
-        # Keep some elements consistent for continuity
-        keep_consistent = random.sample(["genre", "setting", "character_type"], 2)
-        
-        # Change other elements to create a new but related story
-        for key in elements:
-            if key not in keep_consistent:
-                if key == "genre":
-                    elements[key] = random.choice([g for g in self.genres if g != elements[key]])
-                elif key == "character_type":
-                    elements[key] = random.choice([c for c in self.character_types if c != elements[key]])
-                elif key == "plot_device":
-                    elements[key] = random.choice([p for p in self.plot_devices if p != elements[key]])
-                elif key == "setting":
-                    elements[key] = random.choice([s for s in self.settings if s != elements[key]])
-                elif key == "theme":
-                    elements[key] = random.choice([t for t in self.themes if t != elements[key]])
-                elif key == "conflict":
-                    elements[key] = random.choice([c for c in self.conflicts if c != elements[key]])
-        
-        # Create sequel-specific prompts
-        sequel_templates = [
-            f"Continuing from where we left off in {original_story['title']}, our {elements['character_type'].lower()} now faces {elements['conflict'].lower()} while dealing with the consequences of {original_story['elements']['plot_device'].lower()}.",
-            
-            f"Years after the events of {original_story['title']}, {elements['setting']} has changed. A new {elements['plot_device'].lower()} emerges, forcing our protagonist to confront {elements['conflict'].lower()} once again.",
-            
-            f"The saga continues as {elements['theme'].lower()} takes center stage in this sequel to {original_story['title']}. Our {elements['character_type'].lower()} must navigate {elements['conflict'].lower()} in an evolving {elements['setting']}."
-        ]
+    def _element_snapshots(self) -> Tuple[List[List[str]], List[Dict[str, int]]]:
+        """Return each element's values and value -> slot map, in ELEMENT_KEYS order, from its alias table
+
+        Bulk paths read these rather than the live lists, so positions always
+        agree with the values the tables draw even after an in-place edit.
+        """
+        tables = [self._element_table(key) for key in self.ELEMENT_KEYS]
+        return [table.values for table in tables], [table.positions for table in tables]
+
+    def _draw_other(self, key: str, current: str) -> str:
+        """Draw a value for key that differs from current in O(1), using the alias table's position map"""
+        table = self._element_table(key)
+        return self._step_other(table.values, table.positions, current)
+
+    def generate_variations_batch(self, base_ideas: List[Dict[str, str]], count: int = 3,
+                                  render: bool = True) -> List[List[Union[str, Tuple[int, ...]]]]:
+        """Generate count variations for every base idea in one call
+
+        With render=False each variation is a tuple of element indices in
+        ELEMENT_KEYS order instead of a rendered prompt.
+        """
+        lists, positions = self._element_snapshots()
+        sizes = [len(values) for values in lists]
+        slots = range(len(self.ELEMENT_KEYS))
+
+        results = []
+        for base in base_ideas:
+            codes = [positions[j].get(base[key], -1) for j, key in enumerate(self.ELEMENT_KEYS)]
+            variations = []
+            for _ in range(count):
+                varied = codes.copy()
+                # Modify 2-3 elements, each to any index except its current one
+                for j in self.rng.sample(slots, self.rng.randint(2, 3)):
+                    current = varied[j]
+                    if current < 0:
+                        varied[j] = self.rng.randrange(sizes[j])
+                    else:
+                        index = self.rng.randrange(sizes[j] - 1)
+                        varied[j] = index + (index >= current)
+                if render:
+                    elements = {key: lists[j][c] if c >= 0 else base[key] for j, (key, c) in enumerate(zip(self.ELEMENT_KEYS, varied))}
+                    variations.append(self.create_prompt(elements))
+                else:
+                    variations.append(tuple(varied))
+            results.append(variations)
+
+        return results
+
+    # Sequel and evolution templates also know the original's title and plot device
+    DERIVED_KEYS = ELEMENT_KEYS + ("title", "original_plot_device")
+
+    SEQUEL_TEMPLATES = [
+        "Continuing from where we left off in {title}, our {character_type_l} now faces {conflict_l} while dealing with the consequences of {original_plot_device_l}.",
         
-        return {
-            "title": f"{original_story['title']}: The Sequel",
-            "prompt": random.choice(sequel_templates),
-            "elements": elements,
-            "original_story": original_story['title']
-        }
-    
-    def evolve_narrative(self, story_id: int, direction: str) -> Dict[str, Any]:
-        """Evolve a narrative in a specific direction based on user input"""
-        if story_id >= len(self.story_history):
-            raise ValueError(f"Story ID {story_id} not found in history")
-        
-        original_story = self.story_history[story_id]
-        elements = original_story["elements"].copy()
-        
-        # Modify the story based on the direction
-        if direction.lower() == "darker":
-            # Make the story darker
-            elements["genre"] = random.choice(["Horror", "Thriller", "Mystery", "Drama"])
-            elements["theme"] = random.choice(["Betrayal", "Survival", "Power", "Justice"])
-            elements["conflict"] = random.choice(["Person vs. Person", "Person vs. Self", "Person vs. Society"])
+        "Years after the events of {title}, {setting} has changed. A new {plot_device_l} emerges, forcing our protagonist to confront {conflict_l} once again.",
+        
+        "The saga continues as {theme_l} takes center stage in this sequel to {title}. Our {character_type_l} must navigate {conflict_l} in an evolving {setting}."
+    ]
+
+    EVOLUTION_TEMPLATES = {
+        "darker": [
+            "As shadows lengthen in {setting}, our {character_type_l} discovers a sinister truth behind {original_plot_device_l}, leading to a confrontation with {conflict_l}.",
             
-            evolution_templates = [
-                f"As shadows lengthen in {elements['setting']}, our {elements['character_type'].lower()} discovers a sinister truth behind {original_story['elements']['plot_device'].lower()}, leading to a confrontation with {elements['conflict'].lower()}.",
-                
-                f"The once hopeful tale takes a grim turn as {elements['theme'].lower()} reveals its darker side. In {elements['setting']}, the {elements['character_type'].lower()} must face {elements['conflict'].lower()} with diminishing options.",
-                
-                f"What began as {original_story['title']} now descends into darkness. The {elements['character_type'].lower()} finds that {elements['plot_device'].lower()} comes with a terrible price in this exploration of {elements['theme'].lower()}."
-            ]
+            "The once hopeful tale takes a grim turn as {theme_l} reveals its darker side. In {setting}, the {character_type_l} must face {conflict_l} with diminishing options.",
             
-        elif direction.lower() == "hopeful":
-            # Make the story more hopeful
-            elements["genre"] = random.choice(["Fantasy", "Adventure", "Romance", "Comedy"])
-            elements["theme"] = random.choice(["Love", "Redemption", "Freedom", "Family"])
-            elements["conflict"] = random.choice(["Person vs. Nature", "Person vs. Technology", "Person vs. Fate"])
+            "What began as {title} now descends into darkness. The {character_type_l} finds that {plot_device_l} comes with a terrible price in this exploration of {theme_l}."
+        ],
+        "hopeful": [
+            "Light breaks through the challenges of {title} as our {character_type_l} discovers new allies in {setting}. Together they transform {conflict_l} into an opportunity for {theme_l}.",
             
-            evolution_templates = [
-                f"Light breaks through the challenges of {original_story['title']} as our {elements['character_type'].lower()} discovers new allies in {elements['setting']}. Together they transform {elements['conflict'].lower()} into an opportunity for {elements['theme'].lower()}.",
-                
-                f"The journey continues with renewed purpose as the {elements['character_type'].lower()} embraces {elements['plot_device'].lower()} with fresh perspective. In {elements['setting']}, {elements['theme'].lower()} blossoms despite {elements['conflict'].lower()}.",
-                
-                f"Rising from the trials of {original_story['title']}, our protagonist finds that {elements['setting']} holds unexpected wonders. This tale of {elements['theme'].lower()} shows how {elements['conflict'].lower()} can lead to growth and connection."
-            ]
+            "The journey continues with renewed purpose as the {character_type_l} embraces {plot_device_l} with fresh perspective. In {setting}, {theme_l} blossoms despite {conflict_l}.",
             
-        elif direction.lower() == "complex":
-            # Make the story more complex
-            elements["genre"] = random.choice(["Science Fiction", "Historical Fiction", "Mystery", "Drama"])
-            elements["theme"] = random.choice(["Identity", "Power", "Justice", "Reality"])
-            elements["conflict"] = random.choice(["Person vs. Society", "Person vs. Reality", "Person vs. Self"])
+            "Rising from the trials of {title}, our protagonist finds that {setting} holds unexpected wonders. This tale of {theme_l} shows how {conflict_l} can lead to growth and connection."
+        ],
+        "complex": [
+            "The seemingly straightforward tale of {title} unravels to reveal intricate layers. In {setting}, our {character_type_l} discovers that {plot_device_l} connects to a web of {theme_l} and {conflict_l}.",
             
-            evolution_templates = [
-                f"The seemingly straightforward tale of {original_story['title']} unravels to reveal intricate layers. In {elements['setting']}, our {elements['character_type'].lower()} discovers that {elements['plot_device'].lower()} connects to a web of {elements['theme'].lower()} and {elements['conflict'].lower()}.",
-                
-                f"As perspectives shift in {elements['setting']}, the line between right and wrong blurs. The {elements['character_type'].lower()} must navigate moral ambiguities of {elements['theme'].lower()} while confronting {elements['conflict'].lower()} from multiple angles.",
-                
-                f"What seemed like a single thread of {elements['plot_device'].lower()} now reveals itself as a tapestry. Our protagonist's journey through {elements['setting']} becomes an exploration of {elements['theme'].lower()} with no easy answers to {elements['conflict'].lower()}."
-            ]
+            "As perspectives shift in {setting}, the line between right and wrong blurs. The {character_type_l} must navigate moral ambiguities of {theme_l} while confronting {conflict_l} from multiple angles.",
             
-        else:  # "action"
-            # Make the story more action-oriented
-            elements["genre"] = random.choice(["Adventure", "Thriller", "Science Fiction", "Fantasy"])
-            elements["theme"] = random.choice(["Survival", "Justice", "Power", "Freedom"])
-            elements["conflict"] = random.choice(["Person vs. Person", "Person vs. Nature", "Person vs. Supernatural"])
+            "What seemed like a single thread of {plot_device_l} now reveals itself as a tapestry. Our protagonist's journey through {setting} becomes an exploration of {theme_l} with no easy answers to {conflict_l}."
+        ],
+        "action": [
+            "The stakes escalate rapidly in {setting} as our {character_type_l} is thrust into a high-octane confrontation. {plot_device_l} becomes a race against time amid intense {conflict_l}.",
             
-            evolution_templates = [
-                f"The stakes escalate rapidly in {elements['setting']} as our {elements['character_type'].lower()} is thrust into a high-octane confrontation. {elements['plot_device'].lower()} becomes a race against time amid intense {elements['conflict'].lower()}.",
-                
-                f"Danger erupts in {elements['setting']} when {elements['plot_device'].lower()} attracts powerful enemies. The {elements['character_type'].lower()} must master new skills to survive {elements['conflict'].lower()} in this adrenaline-fueled chapter of {elements['theme'].lower()}.",
-                
-                f"From the foundations of {original_story['title']} emerges a battle for survival. In {elements['setting']}, our protagonist faces relentless {elements['conflict'].lower()} that transforms {elements['theme'].lower()} into a trial by fire."
-            ]
+            "Danger erupts in {setting} when {plot_device_l} attracts powerful enemies. The {character_type_l} must master new skills to survive {conflict_l} in this adrenaline-fueled chapter of {theme_l}.",
+            
+            "From the foundations of {title} emerges a battle for survival. In {setting}, our protagonist faces relentless {conflict_l} that transforms {theme_l} into a trial by fire."
+        ]
+    }
+
+    def generate_sequel_idea(self, original_story: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate a sequel based on an original story"""
+        return self._build_sequels([original_story])[0]
+    
+    def evolve_narrative(self, story_id: int, direction: str) -> Dict[str, Any]:
+        """Evolve a narrative in a specific direction based on user input"""
+        return self._build_evolutions([story_id], [direction])[0]
+    
+    def generate_sequels_batch(self, story_ids: List[int]) -> List[Dict[str, Any]]:
+        """Generate a sequel for every story ID and add them all to the history and lineage"""
+        sequels = self._build_sequels([self.story_history[story_id] for story_id in story_ids])
+        self._append_derived(sequels)
+        return sequels
+    
+    def evolve_narratives_batch(self, story_ids: List[int],
+                                directions: Union[str, List[str]]) -> List[Dict[str, Any]]:
+        """Evolve every story ID in one direction, or each in its own, and add the results to the history"""
+        if isinstance(directions, str):
+            directions = [directions] * len(story_ids)
+        elif len(directions) != len(story_ids):
+            raise ValueError("Need one direction per story ID")
+        evolved = self._build_evolutions(story_ids, directions)
+        self._append_derived(evolved)
+        return evolved
+    
+    def _build_sequels(self, originals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Build sequels for many stories, drawing every changed element in one pass"""
+        count = len(originals)
+        keys = self.ELEMENT_KEYS
+        lists, positions = self._element_snapshots()
+        # Two of genre, setting and character type stay for continuity; the rest change
+        kept_out = self.rng.choices([keys.index("genre"), keys.index("setting"), keys.index("character_type")], k=count)
+        always = [keys.index(key) for key in ("plot_device", "theme", "conflict")]
+        templates = self.rng.choices(self._sequel_templates, k=count)
+        plot_device = keys.index("plot_device")
         
-        return {
-            "title": f"{original_story['title']}: Evolved",
-            "prompt": random.choice(evolution_templates),
-            "elements": elements,
-            "original_story": original_story['title'],
-            "evolution_direction": direction
-        }
+        sequels = []
+        for original, changed, template in zip(originals, kept_out, templates):
+            row = [original["elements"][key] for key in keys]
+            for j in (changed, *always):
+                row[j] = self._step_other(lists[j], positions[j], row[j])
+            title = original["title"]
+            row += [title, original["elements"]["plot_device"]]
+            sequels.append({
+                "title": f"{title}: The Sequel",
+                "prompt": template.render_row(row, [value.lower() for value in row]),
+                "elements": dict(zip(keys, row)),
+                "original_story": title,
+                "parent_id": original.get("id")
+            })
+        return sequels
+    
+    def _build_evolutions(self, story_ids: List[int], directions: List[str]) -> List[Dict[str, Any]]:
+        """Build evolutions for many stories, drawing each direction's elements in one pass"""
+        history_size = len(self.story_history)
+        # Any direction without a profile evolves towards action
+        groups: Dict[str, List[int]] = {}
+        for i, (story_id, direction) in enumerate(zip(story_ids, directions)):
+            if story_id >= history_size:
+                raise ValueError(f"Story ID {story_id} not found in history")
+            profile = direction.lower()
+            groups.setdefault(profile if profile in self.direction_profiles else "action", []).append(i)
+        
+        keys = self.ELEMENT_KEYS
+        evolved: List[Optional[Dict[str, Any]]] = [None] * len(story_ids)
+        for profile, members in groups.items():
+            columns = {key: self._direction_table(profile, key).draw_many(len(members), self.rng)
+                       for key in self.direction_profiles[profile]}
+            templates = self.rng.choices(self._evolution_templates[profile], k=len(members))
+            for n, i in enumerate(members):
+                original = self.story_history[story_ids[i]]
+                elements = original["elements"].copy()
+                for key, column in columns.items():
+                    elements[key] = column[n]
+                title = original["title"]
+                row = [elements[key] for key in keys] + [title, original["elements"]["plot_device"]]
+                evolved[i] = {
+                    "title": f"{title}: Evolved",
+                    "prompt": templates[n].render_row(row, [value.lower() for value in row]),
+                    "elements": elements,
+                    "original_story": title,
+                    "evolution_direction": directions[i],
+                    "parent_id": story_ids[i]
+                }
+        return evolved
+    
+    def _step_other(self, values: List[str], positions: Dict[str, int], current: str) -> str:
+        """Draw a value other than current by stepping a non-zero distance from its slot"""
+        position = positions.get(current)
+        if position is None:
+            return values[int(self.rng.random() * len(values))]
+        size = len(values)
+        return values[(position + 1 + int(self.rng.random() * (size - 1))) % size]
+    
+    def _append_derived(self, stories: List[Dict[str, Any]]):
+        """Number derived stories from the end of the history and append them together"""
+        first_id = len(self.story_history)
+        for i, story in enumerate(stories):
+            story["id"] = first_id + i
+        self._append_history(stories)
     
     def generate_story_ideas(self, count: int = 5) -> List[Dict[str, Any]]:
         """Generate multiple story ideas with variations"""
+        story_ideas = self._build_story_ideas(len(self.story_history), count)
+        
+        self._append_history(story_ideas)
+        return story_ideas
+
+    def generate_story_ideas_parallel(self, count: int = 5, workers: Optional[int] = None,
+                                      seed: Any = 0) -> List[Dict[str, Any]]:
+        """Generate story ideas across a process pool and merge them into the history
+
+        Each shard gets a reserved range of IDs and its own seeded RNG, so the
+        merged history has dense IDs and depends only on (seed, count, workers).
+        """
+        workers = workers or os.cpu_count() or 1
+        sizes = [count // workers + (1 if i < count % workers else 0) for i in range(workers)]
+        shards = []
+        first_id = len(self.story_history)
+        for i, size in enumerate(sizes):
+            if size:
+                shards.append((self._element_state(), f"{seed}:{i}", first_id, size))
+                first_id += size
+        
         story_ideas = []
+        with ProcessPoolExecutor(max_workers=len(shards) or 1) as executor:
+            for shard in executor.map(_generate_story_shard, shards):
+                story_ideas.extend(shard)
         
-        for i in range(count):
-            # Generate base idea
-            base_elements = self.generate_basic_idea()
-            base_prompt = self.create_prompt(base_elements)
-            
-            # Generate variations
-            variations = self.generate_variations(base_elements)
-            
-            # Create a title
-            words = base_prompt.split()
-            title_words = random.sample([w for w in words if len(w) > 3], min(3, len([w for w in words if len(w) > 3])))
-            title = "The " + " ".join(title_words).replace(".", "").replace(",", "")
-            
-            story_idea = {
-                "id": len(self.story_history),
-                "title": title,
-                "prompt": base_prompt,
-                "elements": base_elements,
-                "variations": variations
-            }
-            
-            story_ideas.append(story_idea)
-            self.story_history.append(story_idea)
+        self._append_history(story_ideas)
+        return story_ideas
+
+    def _element_state(self) -> Dict[str, Any]:
+        """Return the element lists and weights a worker process needs to rebuild this generator"""
+        return {
+            "genres": self.genres,
+            "character_types": self.character_types,
+            "plot_devices": self.plot_devices,
+            "settings": self.settings,
+            "themes": self.themes,
+            "conflicts": self.conflicts,
+            "element_weights": self.element_weights
+        }
+
+    def iter_story_ideas(self, count: Optional[int] = None, chunk_size: int = 100,
+                         keep_history: bool = True) -> Iterator[List[Dict[str, Any]]]:
+        """Lazily yield story ideas in chunks of chunk_size, forever if count is None
+
+        Nothing is generated until the consumer asks for the next chunk, so a slow
+        writer or socket throttles generation. With keep_history=False the chunks
+        are not added to story_history and memory stays constant.
+        """
+        next_id = len(self.story_history)
+        produced = 0
+        while count is None or produced < count:
+            if keep_history:
+                # Other stories may have been added while the consumer held the last chunk
+                next_id = len(self.story_history)
+            size = chunk_size if count is None else min(chunk_size, count - produced)
+            chunk = self._build_story_ideas(next_id, size)
+            if keep_history:
+                self._append_history(chunk)
+            next_id += size
+            produced += size
+            yield chunk
+
+    def _build_story_ideas(self, first_id: int, count: int) -> List[Dict[str, Any]]:
+        """Generate count story ideas with variations and titles, drawing the random choices in bulk"""
+        keys = self.ELEMENT_KEYS
+        lists, positions = self._element_snapshots()
+        lowered = [{value: value.lower() for value in values} for values in lists]
+        slots = range(len(keys))
+        
+        # Each phase runs over the whole chunk, so profiling sections cost nothing per story
+        with self._section("element draw"):
+            # The snapshots above came from these same tables, so every drawn value has a position
+            columns = [self._element_table(key).draw_many(count, self.rng) for key in keys]
+            # One base template and three variation templates per story
+            templates = self.rng.choices(self._prompt_templates, k=count * 4)
+            changes = self.rng.choices(self._change_patterns, k=count * 3)
+            rows = [list(row) for row in zip(*columns)]
+        
+        with self._section("base prompt render"):
+            lower_rows = [[lowered[j][row[j]] for j in slots] for row in rows]
+            prompts = [templates[4 * i].render_row(row, lower_row) for i, (row, lower_row) in enumerate(zip(rows, lower_rows))]
+        
+        with self._section("variations"):
+            # Variations change 2-3 elements, stepping a non-zero distance so each value differs
+            rand = self.rng.random
+            variations = []
+            for i, (row, lower_row) in enumerate(zip(rows, lower_rows)):
+                story_variations = []
+                for v in range(1, 4):
+                    varied = row.copy()
+                    lower_varied = lower_row.copy()
+                    for j in changes[3 * i + v - 1]:
+                        values = lists[j]
+                        size = len(values)
+                        value = values[(positions[j][row[j]] + 1 + int(rand() * (size - 1))) % size]
+                        varied[j] = value
+                        lower_varied[j] = lowered[j][value]
+                    story_variations.append(templates[4 * i + v].render_row(varied, lower_varied))
+                variations.append(story_variations)
+        
+        with self._section("title"):
+            titles = [self._make_title(templates[4 * i].title_words(row)) for i, row in enumerate(rows)]
+        
+        with self._section("assemble"):
+            story_ideas = [{
+                "id": first_id + i,
+                "title": titles[i],
+                "prompt": prompts[i],
+                "elements": dict(zip(keys, row)),
+                "variations": variations[i]
+            } for i, row in enumerate(rows)]
         
         return story_ideas
 
-    def save_to_file(self, filename: str = "story_ideas.json"):
-        """Save generated story ideas to a JSON file"""
-        with open(filename, 'w') as f:
+    def _section(self, name: str):
+        """Time a phase of the bulk path under name while profiling is enabled"""
+        return self.profiler.section(name) if self.profiler is not None else _NO_SECTION
+
+    def _make_title(self, title_pool: List[str]) -> str:
+        """Sample up to three title words"""
+        return "The " + " ".join(self.rng.sample(title_pool, min(3, len(title_pool))))
+
+    def _append_history(self, stories: List[Dict[str, Any]]):
+        """Add stories to the history in a single batched operation"""
+        self.story_history.extend(stories)
+        for story in stories:
+            self.lineage.record(story)
+            if self.similarity_index is not None:
+                self.similarity_index.add(story)
+
+    def enable_similarity_index(self, num_perm: int = 64, bands: int = 16) -> "StorySimilarityIndex":
+        """Index the history for near-duplicate search and keep the index updated from now on"""
+        self.similarity_index = StorySimilarityIndex(num_perm, bands)
+        for story in self.story_history:
+            self.similarity_index.add(story)
+        return self.similarity_index
+
+    # Methods enable_profiling() wraps, outermost stages first
+    PROFILED_STAGES = (
+        "generate_story_ideas", "generate_sequels_batch", "evolve_narratives_batch", "_build_story_ideas",
+        "generate_basic_idea", "create_prompt", "generate_variations", "_append_history"
+    )
+
+    def enable_profiling(self, profiler: Optional["StoryProfiler"] = None) -> "StoryProfiler":
+        """Time every profiled stage from now on; returns the profiler collecting the numbers"""
+        self.disable_profiling()
+        self.profiler = profiler or StoryProfiler()
+        # Instance attributes shadow the methods, so disabling leaves no trace on the hot path
+        for name in self.PROFILED_STAGES:
+            setattr(self, name, self.profiler.wrap(name, getattr(self, name)))
+        return self.profiler
+
+    def disable_profiling(self):
+        """Remove the profiling wrappers; the profiler keeps what it recorded"""
+        for name in self.PROFILED_STAGES:
+            self.__dict__.pop(name, None)
+        self.profiler = None
+
+    def add_derived_story(self, story: Dict[str, Any]) -> Dict[str, Any]:
+        """Give a sequel or evolution the next ID and add it to the history and lineage"""
+        self._append_derived([story])
+        return story
+
+    def evolve_descendants(self, story_id: int, direction: str) -> List[Dict[str, Any]]:
+        """Evolve every story derived from story_id, directly or not, in the given direction"""
+        # Snapshot first so the new evolutions are not evolved in turn
+        descendants = list(self.lineage.descendants(story_id))
+        return self.evolve_narratives_batch(descendants, direction)
+
+    def _rebuild_lineage(self):
+        """Rebuild the lineage index from the parent IDs persisted with the history"""
+        self.lineage = StoryLineage()
+        if isinstance(self.story_history, SQLiteStoryHistory):
+            pairs = self.story_history.lineage_pairs()
+        else:
+            pairs = ((story.get("id"), story.get("parent_id")) for story in self.story_history)
+        for child, parent in pairs:
+            self.lineage.add(child, parent)
+
+    def save_to_file(self, filename: Optional[str] = None):
+        """Save generated story ideas to a JSON file (default story_ideas.json)
+
+        A SQLite history is flushed first. Without a filename that is all it
+        does; with one, the history is also exported there, one story at a time.
+        """
+        if isinstance(self.story_history, SQLiteStoryHistory):
+            # Only the rows added since the last flush are written
+            self.story_history.flush()
+            if filename is None:
+                return
+            with open(filename, 'w') as f:
+                # Same layout as json.dump(..., indent=4) without holding the history in memory
+                f.write("[")
+                for i, story in enumerate(self.story_history):
+                    f.write(",\n    " if i else "\n    ")
+                    f.write(json.dumps(story, indent=4).replace("\n", "\n    "))
+                f.write("\n]" if len(self.story_history) else "]")
+            return
+        with open(filename or "story_ideas.json", 'w') as f:
             json.dump(self.story_history, f, indent=4)
 
-    def load_from_file(self, filename: str = "story_ideas.json") -> bool:
-        """Load story ideas from a JSON file"""
+    def load_from_file(self, filename: str = "story_ideas.json", stream: bool = False) -> bool:
+        """Load story ideas from a JSON file
+
+        With stream=True records are parsed one at a time instead of reading the
+        whole file first, and a SQLite history is filled in batches.
+        """
+        try:
+            if stream:
+                stories = (story for _, _, story in iter_story_file(filename))
+            else:
+                with open(filename, 'r') as f:
+                    stories = json.load(f)
+                if not isinstance(stories, list):
+                    raise ValueError(f"{filename} does not contain a JSON array")
+            if isinstance(self.story_history, SQLiteStoryHistory):
+                # One transaction, so a missing or malformed file leaves the stored history as it was
+                self.story_history.replace(stories)
+            else:
+                self.story_history = list(stories)
+            self._rebuild_lineage()
+            if self.similarity_index is not None:
+                self.enable_similarity_index(self.similarity_index.num_perm, self.similarity_index.bands)
+            return True
+        except (FileNotFoundError, ValueError):
+            return False
+
+
+def iter_story_file(filename: str, chunk_size: int = 1 << 20) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    """Yield (byte offset, byte length, story) for each record of a JSON array file, reading it in chunks"""
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    text = ""
+    pos = 0
+    # Byte offset of text[pos] in the file
+    byte_pos = 0
+    ascii_only = True
+    started = False
+    eof = False
+    with open(filename, 'rb') as f:
+        while True:
+            # Skip whitespace, the opening bracket and separators; stop at the closing bracket
+            while pos < len(text) and (text[pos] in " \t\r\n,[" or text[pos] == "]"):
+                if text[pos] == "[":
+                    started = True
+                elif text[pos] == "]":
+                    return
+                byte_pos += 1
+                pos += 1
+
+            story = None
+            if pos < len(text):
+                if not started:
+                    raise ValueError(f"{filename} does not contain a JSON array")
+                try:
+                    story, end = decoder.raw_decode(text, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+            if story is not None:
+                length = end - pos if ascii_only else len(text[pos:end].encode("utf-8"))
+                yield byte_pos, length, story
+                byte_pos += length
+                pos = end
+                continue
+
+            if eof:
+                if started:
+                    raise ValueError(f"{filename} ends before its closing bracket")
+                return
+            # Need more data: drop what has been consumed and read the next chunk
+            data = f.read(chunk_size)
+            eof = not data
+            text = text[pos:] + utf8.decode(data, final=eof)
+            pos = 0
+            ascii_only = text.isascii()
+
+
+class StoryFile:
+    """Lazy, read-only view of a story_ideas.json file with an on-disk offset index
+
+    The first open scans the file once and writes <filename>.idx with each
+    story's ID, byte offset and length. Later opens only read that index, and
+    get() seeks straight to one story without parsing the rest.
+    """
+
+    _MAGIC = b"STORYIX1"
+
+    def __init__(self, filename: str = "story_ideas.json"):
+        self.filename = filename
+        self.index_filename = filename + ".idx"
+        if not self._load_index():
+            self._build_index()
+
+    def _source_stamp(self) -> Tuple[int, int]:
+        stat = os.stat(self.filename)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _load_index(self) -> bool:
+        """Read the offset index if it exists and matches the current file"""
         try:
-            with open(filename, 'r') as f:
-                self.story_history = json.load(f)
+            with open(self.index_filename, 'rb') as f:
+                if f.read(8) != self._MAGIC:
+                    return False
+                header = array('q')
+                header.fromfile(f, 3)
+                size, mtime, count = header
+                if (size, mtime) != self._source_stamp():
+                    return False
+                self.ids, self.offsets, self.lengths = array('q'), array('q'), array('q')
+                for column in (self.ids, self.offsets, self.lengths):
+                    column.fromfile(f, count)
             return True
-        except (FileNotFoundError, json.JSONDecodeError):
+        except (FileNotFoundError, EOFError):
             return False
 
+    def _build_index(self):
+        """Scan the file once and persist (id, offset, length) sorted by ID"""
+        entries = sorted((story.get("id", position), offset, length)
+                         for position, (offset, length, story) in enumerate(iter_story_file(self.filename)))
+        self.ids = array('q', (entry[0] for entry in entries))
+        self.offsets = array('q', (entry[1] for entry in entries))
+        self.lengths = array('q', (entry[2] for entry in entries))
+        with open(self.index_filename, 'wb') as f:
+            f.write(self._MAGIC)
+            array('q', [*self._source_stamp(), len(entries)]).tofile(f)
+            for column in (self.ids, self.offsets, self.lengths):
+                column.tofile(f)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, story_id: int) -> bool:
+        position = bisect_left(self.ids, story_id)
+        return position < len(self.ids) and self.ids[position] == story_id
+
+    def get(self, story_id: int) -> Dict[str, Any]:
+        """Fetch one story by ID with a binary search and a single read"""
+        position = bisect_left(self.ids, story_id)
+        if position == len(self.ids) or self.ids[position] != story_id:
+            raise KeyError(f"Story ID {story_id} not found in {self.filename}")
+        with open(self.filename, 'rb') as f:
+            f.seek(self.offsets[position])
+            return json.loads(f.read(self.lengths[position]))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for _, _, story in iter_story_file(self.filename):
+            yield story
+
+
+class PromptTemplate:
+    """A prompt template compiled once for rendering and title word extraction
+
+    Slots refer to elements by position in keys. Rendering takes a row of element
+    values plus the same row in lower case, so no per-slot work is left to do.
+    """
+
+    _SLOT = re.compile(r"([^{]*)\{(\w+)\}(.*)")
+
+    def __init__(self, text: str, keys: Tuple[str, ...]):
+        self.text = text
+        self.keys = keys
+        # Title words in prompt order: fixed words, or a slot whose words depend on the value
+        self._title_parts: List[Union[List[str], Tuple[int, bool, str, str, Dict[str, List[str]]]]] = []
+        tokens = []
+        for token in text.split():
+            match = self._SLOT.fullmatch(token)
+            if match is None:
+                tokens.append(token)
+                if len(token) > 3:
+                    self._add_fixed_word(token)
+                continue
+            prefix, name, suffix = match.groups()
+            lower = name.endswith("_l")
+            position = keys.index(name[:-2] if lower else name)
+            # Positional fields: 0..n-1 take the row, n..2n-1 the lower-cased row
+            tokens.append(f"{prefix}{{{position + len(keys) if lower else position}}}{suffix}")
+            self._title_parts.append((position, lower, prefix, suffix, {}))
+        self._format = " ".join(tokens)
+
+    def _add_fixed_word(self, word: str):
+        word = word.replace(".", "").replace(",", "")
+        if self._title_parts and isinstance(self._title_parts[-1], list):
+            self._title_parts[-1].append(word)
+        else:
+            self._title_parts.append([word])
+
+    def render(self, elements: Dict[str, str]) -> str:
+        row = [elements[key] for key in self.keys]
+        return self._format.format(*row, *[value.lower() for value in row])
+
+    def render_row(self, row: List[str], lowered: List[str]) -> str:
+        return self._format.format(*row, *lowered)
+
+    def title_words(self, row: List[str]) -> List[str]:
+        """Return the rendered prompt's words longer than three characters, stripped of . and ,"""
+        pool = []
+        for part in self._title_parts:
+            if isinstance(part, list):
+                pool.extend(part)
+                continue
+            position, lower, prefix, suffix, cache = part
+            value = row[position]
+            words = cache.get(value)
+            if words is None:
+                # Worked out once per element value and slot
+                rendered = f"{prefix}{value.lower() if lower else value}{suffix}"
+                words = cache[value] = [w.replace(".", "").replace(",", "") for w in rendered.split() if len(w) > 3]
+            pool.extend(words)
+        return pool
+
+
+class StorySimilarityIndex:
+    """MinHash signatures of stories, bucketed by LSH bands for near-duplicate search
+
+    A story's shingles are its element values plus the word trigrams of its
+    prompt. Stories sharing all rows of at least one band become candidates, so
+    a query only compares against a few stories instead of the whole history.
+    """
+
+    # Shingle hash vectors are cached; the cache is dropped when it grows past this
+    _CACHE_LIMIT = 100_000
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._salt = f"{seed}:".encode("utf-8")
+        self._hash_cache: Dict[str, array] = {}
+        self.signatures: Dict[int, Tuple[int, ...]] = {}
+        self._buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(bands)]
+
+    @staticmethod
+    def shingles(story: Dict[str, Any]) -> set:
+        tokens = {f"{key}={value}" for key, value in story["elements"].items()}
+        words = story["prompt"].lower().replace(".", "").replace(",", "").replace("?", "").split()
+        tokens.update(" ".join(words[i:i + 3]) for i in range(len(words) - 2))
+        return tokens
+
+    def _token_hashes(self, token: str) -> array:
+        """Return num_perm independent 32-bit hashes of a shingle"""
+        hashes = self._hash_cache.get(token)
+        if hashes is None:
+            if len(self._hash_cache) >= self._CACHE_LIMIT:
+                self._hash_cache.clear()
+            digest = hashlib.shake_128(self._salt + token.encode("utf-8")).digest(4 * self.num_perm)
+            hashes = self._hash_cache[token] = array('I', digest)
+        return hashes
+
+    def signature(self, story: Dict[str, Any]) -> Tuple[int, ...]:
+        # Column-wise minimum over the shingles' hash vectors
+        return tuple(map(min, zip(*[self._token_hashes(token) for token in self.shingles(story)])))
+
+    def _bands(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def add(self, story: Dict[str, Any]):
+        """Index a story under its ID"""
+        signature = self.signature(story)
+        self.signatures[story["id"]] = signature
+        for band, key in self._bands(signature):
+            self._buckets[band].setdefault(key, []).append(story["id"])
+
+    def find_similar(self, story: Dict[str, Any], threshold: float = 0.5) -> List[Tuple[int, float]]:
+        """Return (story ID, estimated Jaccard similarity) of indexed stories at or above threshold"""
+        signature = self.signature(story)
+        candidates = set()
+        for band, key in self._bands(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+        candidates.discard(story.get("id"))
+
+        matches = []
+        for candidate in candidates:
+            similarity = sum(x == y for x, y in zip(signature, self.signatures[candidate])) / self.num_perm
+            if similarity >= threshold:
+                matches.append((candidate, similarity))
+        matches.sort(key=lambda match: (-match[1], match[0]))
+        return matches
+
+    def dedupe(self, stories: Iterable[Dict[str, Any]], threshold: float = 0.8) -> List[Dict[str, Any]]:
+        """Keep the first story of every group of near-duplicates"""
+        seen = StorySimilarityIndex(self.num_perm, self.bands)
+        seen._salt = self._salt
+        kept = []
+        for position, story in enumerate(stories):
+            # Kept stories are indexed by position, so the query must not carry an ID that could collide
+            unnumbered = {**story, "id": None}
+            if not seen.find_similar(unnumbered, threshold):
+                unnumbered["id"] = position
+                seen.add(unnumbered)
+                kept.append(story)
+        return kept
+
+
+# Stands in for a profiling section when profiling is off
+_NO_SECTION = nullcontext()
+
+
+def _generate_story_shard(args: Tuple[Dict[str, Any], str, int, int]) -> List[Dict[str, Any]]:
+    """Worker entry point for generate_story_ideas_parallel"""
+    state, seed, first_id, count = args
+    generator = StoryIdeaGenerator(seed=seed)
+    for name, value in state.items():
+        setattr(generator, name, value)
+    return generator._build_story_ideas(first_id, count)
+
+
+class AliasTable:
+    """Vose alias table: O(n) to build, then O(1) per weighted draw"""
+
+    def __init__(self, values: List[str], weights: List[float]):
+        if not values or min(weights) < 0 or sum(weights) <= 0:
+            raise ValueError("Alias tables need at least one value and non-negative weights with a positive sum")
+        # The source list itself is kept to detect reassignment; values is a snapshot to draw from
+        self.source = values
+        # A VersionedList's mutation count at build time; other lists are compared by value instead
+        self.version = getattr(values, "version", None)
+        self.values = list(values)
+        # Slot of each value in the snapshot, for draws that must avoid a given value
+        self.positions = {value: i for i, value in enumerate(self.values)}
+        n = len(values)
+        self.uniform = len(set(weights)) == 1
+        total = sum(weights)
+        scaled = [weight * n / total for weight in weights]
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left over is 1 up to rounding error
+
+    def stale(self, values: List[str]) -> bool:
+        """Check for a replaced or edited list; setting weights drops the table instead
+
+        O(1) for a VersionedList. Plain lists, such as the short direction
+        profiles, are compared with the snapshot.
+        """
+        if values is not self.source:
+            return True
+        if self.version is None:
+            return values != self.values
+        return values.version != self.version
+
+    def draw(self, rng=random) -> str:
+        i = int(rng.random() * len(self.values))
+        return self.values[i] if rng.random() < self.prob[i] else self.values[self.alias[i]]
+
+    def draw_many(self, count: int, rng=random) -> List[str]:
+        if self.uniform:
+            return rng.choices(self.values, k=count)
+        values, prob, alias, n, rand = self.values, self.prob, self.alias, len(self.values), rng.random
+        result = []
+        for _ in range(count):
+            i = int(rand() * n)
+            result.append(values[i] if rand() < prob[i] else values[alias[i]])
+        return result
+
+
+class StoryLineage:
+    """Parent and child links between stories and the stories derived from them"""
+
+    def __init__(self):
+        self.parents: Dict[int, int] = {}
+        self.children: Dict[int, List[int]] = {}
+
+    def add(self, story_id: Optional[int], parent_id: Optional[int]):
+        """Link story_id to the story it was derived from, if any"""
+        if story_id is None or parent_id is None:
+            return
+        self.parents[story_id] = parent_id
+        self.children.setdefault(parent_id, []).append(story_id)
+
+    def record(self, story: Dict[str, Any]):
+        self.add(story.get("id"), story.get("parent_id"))
+
+    def ancestors(self, story_id: int) -> List[int]:
+        """Return the chain of parents from story_id up to its root, in O(depth)"""
+        chain = []
+        while story_id in self.parents:
+            story_id = self.parents[story_id]
+            chain.append(story_id)
+        return chain
+
+    def root(self, story_id: int) -> int:
+        """Return the original story a chain of sequels and evolutions started from"""
+        chain = self.ancestors(story_id)
+        return chain[-1] if chain else story_id
+
+    def descendants(self, story_id: int) -> Iterator[int]:
+        """Yield every story derived from story_id, directly or not, depth first"""
+        stack = list(reversed(self.children.get(story_id, [])))
+        while stack:
+            child = stack.pop()
+            yield child
+            stack.extend(reversed(self.children.get(child, [])))
+
+
+class SQLiteStoryHistory:
+    """story_history backend kept in a local SQLite database in WAL mode
+
+    Supports the list operations the generator uses: len(), lookup by ID,
+    iteration, append() and extend(). New stories are buffered in memory and
+    written in one transaction whenever flush_every of them are pending, or
+    by an explicit flush(). Stories read back are fresh dicts.
+    """
+
+    def __init__(self, path: str = "story_history.db", flush_every: int = 10_000):
+        self.path = path
+        self.flush_every = flush_every
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS stories (id INTEGER PRIMARY KEY, parent_id INTEGER, data TEXT NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS stories_parent ON stories (parent_id)")
+        self.connection.commit()
+        self._stored = self.connection.execute("SELECT COUNT(*) FROM stories").fetchone()[0]
+        self._pending: List[Dict[str, Any]] = []
+
+    def __len__(self) -> int:
+        return self._stored + len(self._pending)
+
+    def __getitem__(self, story_id: int) -> Dict[str, Any]:
+        if story_id < 0:
+            story_id += len(self)
+        if not 0 <= story_id < len(self):
+            raise IndexError(f"Story ID {story_id} out of range")
+        if story_id >= self._stored:
+            return self._pending[story_id - self._stored]
+        # Primary key lookup, O(log n) in the table's B-tree
+        row = self.connection.execute("SELECT data FROM stories WHERE id = ?", (story_id,)).fetchone()
+        return json.loads(row[0])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for (data,) in self.connection.execute("SELECT data FROM stories ORDER BY id"):
+            yield json.loads(data)
+        yield from list(self._pending)
+
+    def append(self, story: Dict[str, Any]):
+        self._pending.append(story)
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def extend(self, stories: Iterable[Dict[str, Any]]):
+        # Taken in slices so a long iterable never buffers more than flush_every stories
+        stories = iter(stories)
+        while True:
+            chunk = list(islice(stories, self.flush_every - len(self._pending)))
+            if not chunk:
+                break
+            self._pending.extend(chunk)
+            if len(self._pending) >= self.flush_every:
+                self.flush()
+
+    def flush(self):
+        """Write the stories added since the last flush in one transaction"""
+        if not self._pending:
+            return
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO stories (id, parent_id, data) VALUES (?, ?, ?)",
+                ((self._stored + i, story.get("parent_id"), json.dumps(story)) for i, story in enumerate(self._pending)))
+        self._stored += len(self._pending)
+        self._pending = []
+
+    def lineage_pairs(self) -> Iterator[Tuple[int, int]]:
+        """Yield (id, parent_id) for every derived story without decoding the stories"""
+        yield from self.connection.execute("SELECT id, parent_id FROM stories WHERE parent_id IS NOT NULL")
+        for i, story in enumerate(list(self._pending)):
+            if story.get("parent_id") is not None:
+                yield self._stored + i, story["parent_id"]
+
+    def clear(self):
+        """Remove every story, stored or pending"""
+        with self.connection:
+            self.connection.execute("DELETE FROM stories")
+        self._stored = 0
+        self._pending = []
+
+    def replace(self, stories: Iterable[Dict[str, Any]]):
+        """Swap every story for stories in one transaction; if reading them fails, nothing changes
+
+        The iterable is consumed while inserting, so a streamed file is never held in memory.
+        """
+        rows = ((i, story.get("parent_id"), json.dumps(story)) for i, story in enumerate(stories))
+        with self.connection:
+            self.connection.execute("DELETE FROM stories")
+            self.connection.executemany("INSERT INTO stories (id, parent_id, data) VALUES (?, ?, ?)", rows)
+        self._stored = self.connection.execute("SELECT COALESCE(MAX(id) + 1, 0) FROM stories").fetchone()[0]
+        self._pending = []
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+
+class StoryProfiler:
+    """Call counts, latencies and net allocated block deltas per profiled stage
+
+    Stages are wrapped methods or sections (named blocks of code); both are
+    attributed to the full stack of enclosing stages, so save_collapsed()
+    writes self time in microseconds in the collapsed-stack format
+    flamegraph.pl and speedscope read.
+    """
+
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, track_blocks: bool = True):
+        # sys.getallocatedblocks() walks the allocator's arenas, so it is optional
+        self.track_blocks = track_blocks
+        self.durations: Dict[str, array] = {}
+        self.blocks: Dict[str, int] = {}
+        self.stacks: Dict[str, int] = {}
+        # Per active stage: [stage, time in profiled children, profiler overhead inside children,
+        # entry time, allocated blocks at entry, start time]
+        self._active: List[List[Any]] = []
+
+    def wrap(self, stage: str, method):
+        """Return method wrapped so every call is recorded under stage"""
+        def profiled(*args, **kwargs):
+            frame = self._begin(stage)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self._end(frame)
+        return profiled
+
+    @contextmanager
+    def section(self, stage: str):
+        """Record the enclosed block under stage"""
+        frame = self._begin(stage)
+        try:
+            yield
+        finally:
+            self._end(frame)
+
+    def _begin(self, stage: str) -> List[Any]:
+        entered = time.perf_counter_ns()
+        frame = [stage, 0, 0, entered, sys.getallocatedblocks() if self.track_blocks else 0, 0]
+        self._active.append(frame)
+        frame[5] = time.perf_counter_ns()
+        return frame
+
+    def _end(self, frame: List[Any]):
+        clock = time.perf_counter_ns
+        # Time the wrappers of nested stages spent on themselves is not the stage's
+        elapsed = clock() - frame[5] - frame[2]
+        blocks = sys.getallocatedblocks() - frame[4] if self.track_blocks else 0
+        self._record(frame[0], elapsed, blocks, elapsed - frame[1])
+        self._active.pop()
+        if self._active:
+            parent = self._active[-1]
+            parent[1] += elapsed
+            parent[2] += clock() - frame[3] - elapsed
+
+    def _record(self, stage: str, elapsed: int, blocks: int, self_time: int):
+        durations = self.durations.get(stage)
+        if durations is None:
+            durations = self.durations[stage] = array("q")
+            self.blocks[stage] = 0
+        durations.append(elapsed)
+        self.blocks[stage] += blocks
+        path = ";".join(frame[0] for frame in self._active)
+        self.stacks[path] = self.stacks.get(path, 0) + self_time
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Summarize every stage; times are in milliseconds"""
+        report = {}
+        for stage, durations in self.durations.items():
+            ordered = sorted(durations)
+            stats = {
+                "calls": len(ordered),
+                "total_ms": sum(ordered) / 1e6,
+                "mean_ms": sum(ordered) / len(ordered) / 1e6,
+                "max_ms": ordered[-1] / 1e6,
+                # Blocks allocated and still alive when the stage returned, not every allocation it made
+                "net_blocks": self.blocks[stage]
+            }
+            for percentile in self.PERCENTILES:
+                # Nearest-rank percentile
+                stats[f"p{percentile}_ms"] = ordered[max(0, -(-len(ordered) * percentile // 100) - 1)] / 1e6
+            report[stage] = stats
+        return report
+
+    def save_json(self, filename: str = "story_profile.json"):
+        """Write the per-stage report to a JSON file"""
+        with open(filename, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def save_collapsed(self, filename: str = "story_profile.folded"):
+        """Write self time per call stack in microseconds, one "a;b;c count" line per stack"""
+        with open(filename, 'w') as f:
+            for path, self_time in sorted(self.stacks.items()):
+                f.write(f"{path} {self_time // 1000}\n")
+
+    def reset(self):
+        self.durations.clear()
+        self.blocks.clear()
+        self.stacks.clear()
+
 
 def display_story_idea(idea: Dict[str, Any]):
     """Display a story idea in a formatted way"""
@@ -313,9 +1320,7 @@ def main():
             story_id = int(input("\nEnter the ID of the story to create a sequel for: "))
             
             if 0 <= story_id < len(generator.story_history):
-                sequel = generator.generate_sequel_idea(generator.story_history[story_id])
-                generator.story_history.append(sequel)
-                sequel["id"] = len(generator.story_history) - 1
+                sequel = generator.add_derived_story(generator.generate_sequel_idea(generator.story_history[story_id]))
                 display_story_idea(sequel)
             else:
                 print("Invalid story ID.")
@@ -342,9 +1347,7 @@ def main():
                 direction_map = {"1": "darker", "2": "hopeful", "3": "complex", "4": "action"}
                 
                 if direction_choice in direction_map:
-                    evolved = generator.evolve_narrative(story_id, direction_map[direction_choice])
-                    generator.story_history.append(evolved)
-                    evolved["id"] = len(generator.story_history) - 1
+                    evolved = generator.add_derived_story(generator.evolve_narrative(story_id, direction_map[direction_choice]))
                     display_story_idea(evolved)
                 else:
                     print("Invalid direction choice.")